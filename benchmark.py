@@ -0,0 +1,401 @@
+import json
+import random
+import string
+import argparse
+import tempfile
+import subprocess
+import tkinter as tk
+import tkinter.ttk as ttk
+
+from sys import platform, version_info
+from pathlib import Path
+from time import perf_counter
+
+import main as demo
+
+from main import JsonStream, Snapshot, Treeview, default_setup
+
+
+class Root(tk.Tk):
+    def __init__(self):
+        super().__init__()
+        self.platform = 'linux' if 'linux' in platform else platform
+        self.style = ttk.Style()
+        self.style.theme_use('clam')
+        self.geometry('1000x700')
+
+
+def generate(count, fanout=10, depth=3, value_size=0, seed=0):
+    def value():
+        return ''.join(rng.choice(string.ascii_letters) for _ in range(value_size))
+
+    def folder(name, level):
+        children = []
+        data = {'text': name, 'open': 1, 'values': ('', 'Node', True, '', '', dt_string, value()),
+                'children': children}
+        for idx in range(fanout):
+            if remaining[0] <= 0:
+                break
+            remaining[0] -= 1
+            if level < depth and not idx % 2:
+                children.append(folder(f'Folder {idx}', level + 1))
+            else:
+                children.append({'text': f'photo{idx}.png',
+                                 'values': ('', 'Leaf', '', '', f'{rng.randrange(10000)} Kb', dt_string, value())})
+        return data
+
+    rng = random.Random(seed)
+    dt_string = '2020/06/15 17:35:14'
+    remaining = [count]
+    items = []
+    while remaining[0] > 0:
+        remaining[0] -= 1
+        items.append(folder(f'Folder {len(items)}', 1))
+
+    return items
+
+
+def populate(root, data, bulk):
+    tree = Treeview(root, setup=default_setup())
+    tree.grid(sticky=tk.NSEW)
+    root.update()
+
+    start = perf_counter()
+    tree.populate('', data, bulk=bulk)
+    root.update()
+    elapsed = perf_counter() - start
+
+    tree.frame.destroy()
+    return elapsed
+
+
+def reads(root, data, model):
+    def walk(item):
+        for child in tree.get_children(item):
+            tree.item(child, 'text')
+            tree.value_get(tree.field.size, child)
+            tree.item_depth(child)
+            walk(child)
+
+    tree = Treeview(root, setup=default_setup(), model=model)
+    tree.grid(sticky=tk.NSEW)
+    tree.populate('', data)
+    root.update()
+
+    start = perf_counter()
+    walk('')
+    tree.serialize()
+    elapsed = perf_counter() - start
+
+    errors = tree.model_check()
+    tree.frame.destroy()
+    if errors:
+        raise AssertionError('\n'.join(errors[:10]))
+
+    return elapsed
+
+
+def nest(events):
+    data = []
+    stack = [data]
+    for op, item in events:
+        if op == 'item':
+            stack[-1].append(item)
+        elif op == 'push':
+            item['children'] = []
+            stack.append(item['children'])
+        elif op == 'pop':
+            stack.pop()
+
+    return data
+
+
+def snapshots(root, data):
+    tree = Treeview(root, setup=default_setup())
+    tree.grid(sticky=tk.NSEW)
+    tree.populate('', data)
+    root.update()
+
+    data = tree.serialize()
+    expected = json.loads(json.dumps(data['data']))
+    header = {'headings': data['headings'], 'columns': data['columns'], 'settings': ()}
+
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for name, reader, file in (('json', JsonStream, Path(folder, 'treeview.json')),
+                                   ('binary', Snapshot, Path(folder, 'treeview.tvb'))):
+            start = perf_counter()
+            if reader is Snapshot:
+                Snapshot.write(file, header, tree.serialize()['data'])
+            else:
+                with open(str(file), 'w') as f:
+                    f.writelines(tree.serialize_iter())
+            saved = perf_counter() - start
+
+            start = perf_counter()
+            stream = reader(file)
+            stream.header()
+            loaded = nest(stream.items())
+            stream.close()
+            elapsed = perf_counter() - start
+
+            if json.loads(json.dumps(loaded)) != expected:
+                raise AssertionError(f'{name} snapshot does not round trip')
+            results.append((name, saved, elapsed, file.stat().st_size))
+
+    tree.frame.destroy()
+    return results
+
+
+def tcl_calls(root, data, batch):
+    def action(name, func):
+        start = tree.tcl.count
+        func()
+        root.update()
+        results[name] = tree.tcl.count - start
+
+    def paste():
+        target = tree.insert('', tk.END, text='Paste Target', values=('', 'Node', True, '', '0 items', '', ''))
+        tree.focus(target)
+        tree.selection_set(target)
+        tree.paste()
+
+    tree = Treeview(root, setup=default_setup(), model=True, batch=batch)
+    tree.grid(sticky=tk.NSEW)
+    tree.populate('', data)
+    root.update()
+
+    results = {}
+    first = tree.get_children()[0]
+    action('control_a', lambda: tree.control_a(None))
+    action('copy', lambda: (tree.selection_set(first), tree.focus(first), tree.copy()))
+    action('paste', paste)
+    action('tag_remove', lambda: tree.tag_remove('selected'))
+
+    tree.frame.destroy()
+    return results
+
+
+def search(root, data):
+    def timed(name, func):
+        start = perf_counter()
+        func()
+        root.update()
+        results.append((name, perf_counter() - start))
+
+    tree = Treeview(root, setup=default_setup(), model=True)
+    tree.grid(sticky=tk.NSEW)
+    tree.populate('', data)
+    root.update()
+
+    results = []
+    timed('build', tree.search_build)
+    for query in ('photo1.png', 'pho', 'folder 1', 'missing'):
+        timed(f'search {query}', lambda: tree.search(query))
+    for query in ('p', 'ph', 'photo', 'photo1', 'photo1.png'):
+        timed(f'filter {query}', lambda: tree.filter(query))
+    timed('clear', tree.filter_clear)
+
+    errors = tree.model_check()
+    tree.frame.destroy()
+    if errors:
+        raise AssertionError('\n'.join(errors[:10]))
+
+    return results
+
+
+def sorting(root, count):
+    def timed(name, column):
+        calls = tree.tcl.count
+        start = perf_counter()
+        tree.sort_column(column)
+        root.update()
+        results.append((name, perf_counter() - start, tree.tcl.count - calls))
+
+    rng = random.Random(count)
+    data = [{'text': f'photo{idx}.png',
+             'values': ('', 'Leaf', '', '', f'{rng.randrange(10000)} Kb',
+                        f'2020/06/{rng.randrange(1, 29):02} 17:{rng.randrange(60):02}:14', '')}
+            for idx in rng.sample(range(count), count)]
+
+    tree = Treeview(root, setup=default_setup(), model=True)
+    tree.grid(sticky=tk.NSEW)
+    tree.populate('', data)
+    root.update()
+
+    results = []
+    timed('name', '#0')
+    timed('name desc', '#0')
+    timed('size', f'#{tree.field.size + 1}')
+    timed('modified', f'#{tree.field.last_modified + 1}')
+    timed('name again', '#0')
+
+    errors = tree.model_check()
+    tree.frame.destroy()
+    if errors:
+        raise AssertionError('\n'.join(errors[:10]))
+
+    return results
+
+
+def operations(root, data):
+    def timed(name, func, done=None):
+        calls = tree.tcl.count
+        start = perf_counter()
+        func()
+        root.update()
+        while done and not done():
+            root.update()
+        results.append((name, perf_counter() - start, tree.tcl.count - calls))
+
+    def select(item):
+        tree.selection_set(item)
+        tree.focus(item)
+
+    tree = Treeview(root, setup=default_setup(), model=True, collisions='suffix')
+    tree.grid(sticky=tk.NSEW)
+    tree.populate('', data)
+    root.update()
+
+    results = []
+    folders = tree.get_children()
+    source, target = folders[min(1, len(folders) - 1)], folders[-1]
+    timed('tags_reset', tree.tags_reset)
+    timed('serialize', tree.serialize)
+    timed('column_fit', lambda: tree.column_fit('#0'))
+    timed('column_fit warm', lambda: tree.column_fit('#0'))
+    timed('control_a', lambda: tree.control_a(None))
+    timed('cut', lambda: (select(source), tree.cut()))
+    timed('paste cut', lambda: (select(target), tree.paste()))
+    timed('undo paste cut', tree.undo)
+    timed('undo cut', tree.undo)
+    timed('copy', lambda: (select(source), tree.copy()))
+    timed('paste', lambda: (select(target), tree.paste()), lambda: not tree.pasting)
+    timed('undo paste', tree.undo)
+    timed('redo paste', tree.redo)
+
+    errors = tree.model_check()
+    tree.frame.destroy()
+    if errors:
+        raise AssertionError('\n'.join(errors[:10]))
+
+    return results
+
+
+def application(data):
+    path = demo._path
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        demo._path = Path(folder)
+        Path(folder, 'images').symlink_to(path.joinpath('images').resolve())
+        with open(str(Path(folder, 'app.json')), 'w') as f:
+            json.dump({'geometry': '1000x700'}, f)
+        setup = default_setup()
+        JsonStream.write(Path(folder, 'treeview.json'),
+                         {'headings': setup['headings'], 'columns': setup['columns'], 'settings': ()}, data)
+
+        try:
+            start = perf_counter()
+            app = demo.App()
+            while app.treeview.loading or app.treeview.journal is None:
+                app.update()
+            results.append(('startup', perf_counter() - start))
+
+            start = perf_counter()
+            app.save()
+            results.append(('save', perf_counter() - start))
+
+            done = []
+            start = perf_counter()
+            app.save(background=True, done=done.append)
+            while not done:
+                app.update()
+            results.append(('save background', perf_counter() - start))
+            if done[0] is not None:
+                raise done[0]
+
+            app.destroy()
+        finally:
+            demo._path = path
+
+    return results
+
+
+def revision():
+    try:
+        return subprocess.run(('git', 'describe', '--always', '--dirty'), capture_output=True, text=True,
+                              cwd=str(Path(__file__).parent), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    def record(benchmark, mode, size, seconds=None, **extra):
+        row = dict(benchmark=benchmark, mode=mode, size=size, seconds=seconds, **extra)
+        rows.append(row)
+
+        line = f'{benchmark:<10} {mode:>18} {size:>8}'
+        if seconds is not None:
+            line += f' {seconds:10.4f}s'
+        for key, value in extra.items():
+            line += f' {value:>10} {key}'
+        print(line)
+
+    parser = argparse.ArgumentParser(description='Treeview benchmarks, run under a display (e.g. xvfb-run).')
+    parser.add_argument('sizes', nargs='*', type=int, default=(1000, 10000, 100000))
+    parser.add_argument('--fanout', type=int, default=10, help='children per generated folder')
+    parser.add_argument('--depth', type=int, default=3, help='folder nesting of the generated tree')
+    parser.add_argument('--value-size', type=int, default=0, help='length of the generated Data column')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the generated values')
+    parser.add_argument('--legacy-limit', type=int, default=10000,
+                        help='largest tree to time with the item by item populate')
+    parser.add_argument('--sort-limit', type=int, default=50000,
+                        help='largest number of siblings to sort')
+    parser.add_argument('--json', metavar='FILE', help='write the results to FILE as JSON')
+    args = parser.parse_args()
+
+    rows = []
+    shape = {'fanout': args.fanout, 'depth': args.depth, 'value_size': args.value_size, 'seed': args.seed}
+    root = Root()
+    for size in args.sizes:
+        data = generate(size, **shape)
+        for bulk in (True, False):
+            if not bulk and size > args.legacy_limit:
+                continue
+
+            record('populate', 'bulk' if bulk else 'legacy', size, populate(root, data, bulk))
+
+        for model in (True, False):
+            record('reads', 'model' if model else 'tk', size, reads(root, data, model))
+
+        for batch in (False, True):
+            for name, calls in tcl_calls(root, data, batch).items():
+                record('tcl', f'{name} {"batch" if batch else "direct"}', size, calls=calls)
+
+        for name, elapsed, calls in operations(root, data):
+            record('operation', name, size, elapsed, calls=calls)
+
+        siblings = min(size, args.sort_limit)
+        for name, elapsed, calls in sorting(root, siblings):
+            record('sort', name, siblings, elapsed, calls=calls)
+
+        for name, elapsed in search(root, data):
+            record('search', name, size, elapsed)
+
+        for name, saved, loaded, file_size in snapshots(root, data):
+            record('save', name, size, saved, bytes=file_size)
+            record('load', name, size, loaded)
+    root.destroy()
+
+    for size in args.sizes:
+        for name, elapsed in application(generate(size, **shape)):
+            record('app', name, size, elapsed)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'revision': revision(), 'python': '.'.join(map(str, version_info[:3])), 'tk': tk.TkVersion,
+                       'platform': platform, 'shape': shape, 'results': rows}, f, indent=3)
+
+
+if __name__ == '__main__':
+    main()
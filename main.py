@@ -1,14 +1,29 @@
+import re
 import json
+import mmap
+import logging
+import sys
+import queue
+import struct
+import threading
+import traceback
 import tkinter as tk
 import tkinter.ttk as ttk
 import tkinter.font as tkfont
 
-from sys import platform
+from sys import platform, byteorder
+from array import array
+from bisect import bisect_left, insort
 from enum import IntEnum
+from time import perf_counter
 from pathlib import Path
 from datetime import datetime
+from itertools import islice, zip_longest
+from contextlib import contextmanager
+from collections import OrderedDict, deque, namedtuple
 
 _path = Path(__file__).cwd()
+log = logging.getLogger(__name__)
 
 SKIP = -1
 CANCEL = -2
@@ -19,6 +34,51 @@ LAST_COLUMN = 990
 WHEEL_MOUSE_UP = 5
 WHEEL_MOUSE_DOWN = 4
 
+PLACEHOLDER = '.placeholder'
+
+AUTOSAVE = 30000
+JOURNAL_LIMIT = 10000
+LOAD_BATCH = 1000
+LOAD_CHUNK = 65536
+SNAPSHOT_SUFFIX = '.tvb'
+SAVE_POLL = 50
+TEXT_CACHE = 10000
+PASTE_SLICE = 0.02
+HISTORY_LIMIT = 100000
+FILTER_DELAY = 150
+WATCHDOG_BUDGET = 50
+WATCHDOG_INTERVAL = 0.1
+SIZE_UNITS = {'b': 1, 'kb': 1024, 'mb': 1024 ** 2, 'gb': 1024 ** 3}
+
+
+def default_setup():
+    return {
+        'headings': (
+            {'text': 'Name', 'anchor': tk.W},
+            {'text': 'IID', 'anchor': tk.W},
+            {'text': 'Item', 'anchor': tk.W},
+            {'text': 'Open', 'anchor': tk.W},
+            {'text': 'Tags', 'anchor': tk.W},
+            {'text': 'Size', 'anchor': tk.W},
+            {'text': 'Last Modified', 'anchor': tk.W},
+            {'text': 'Data', 'anchor': tk.W}),
+        'columns': (
+            {'width': 180, 'minwidth': 3, 'stretch': tk.NO, 'type': 'Entry', 'unique': True},
+            {'width': 70, 'minwidth': 3, 'stretch': tk.NO},
+            {'width': 70, 'minwidth': 3, 'stretch': tk.NO},
+            {'width': 70, 'minwidth': 3, 'stretch': tk.NO},
+            # {'width': 120, 'minwidth': 3, 'stretch': tk.NO},
+            {'width': 120, 'minwidth': 3, 'stretch': tk.NO, 'type': 'Entry'},
+            {'width': 80, 'minwidth': 3, 'stretch': tk.NO},
+            # {'width': 130, 'minwidth': 3, 'stretch': tk.NO},
+            {'width': 130, 'minwidth': 3, 'stretch': tk.NO, 'type': 'Combobox',
+                'values': ('Value 1', 'Value 2', 'Value 3', 'Value 4', 'Value 5'),
+             },
+            {'width': 180, 'minwidth': 3, 'stretch': tk.YES, 'type': 'Combobox',
+                'values': ('Value 1', 'Value 2', 'Value 3', 'Value 4', 'Value 5'),
+             },
+        )}
+
 
 class App(tk.Tk):
     def __init__(self):
@@ -31,6 +91,8 @@ class App(tk.Tk):
         self.frame.grid(sticky=tk.NSEW)
 
         self.app_data = {}
+        self.journal = Journal(_path.joinpath('treeview.journal'))
+        self.saver = None
 
         self.style = ttk.Style()
         self.style.theme_use('clam')
@@ -78,40 +140,52 @@ class App(tk.Tk):
             self.option_add("*TCombobox*Listbox*Background", 'white')
             self.option_add("*TCombobox*Listbox*Foreground", '#000000')
 
-            file = _path.joinpath('treeview.json')
+            def loaded():
+                if stream:
+                    stream.close()
+                    setup.update(stream.tail)
+                if progress:
+                    progress.destroy()
+
+                tree.journal_replay(self.journal.read())
+                tree.journal = self.journal
+                tree.history.clear()
+                self.after(AUTOSAVE, self.autosave)
+
+                settings = dict(setup.get('settings', ()))
+
+                view = settings.get('view')
+                if view:
+                    tree.xview('moveto', view[0])
+                    tree.yview('moveto', view[1])
+
+                tree.focus_set()
+                if tree.get_children():
+                    tree.see(tree.get_children()[0])
+
+                item = settings.get('focus')
+                if (not item or not tree.exists(item)) and tree.get_children():
+                    item = tree.get_children()[0]
+                if item:
+                    tree.focus(item)
+                    tree.selection_add(item)
+                    tree.grid(sticky=tk.NSEW, row=0, column=0)
+
+            stream = progress = None
+            file = _path.joinpath(self.app_data.get('snapshot', 'treeview.json'))
             if file.exists():
-                with open(str(file)) as f:
-                    setup = json.load(f)
+                stream = Snapshot(file) if file.suffix == SNAPSHOT_SUFFIX else JsonStream(file)
+                setup = stream.header()
             else:
-                setup = {
-                    'headings': (
-                        {'text': 'Name', 'anchor': tk.W},
-                        {'text': 'IID', 'anchor': tk.W},
-                        {'text': 'Item', 'anchor': tk.W},
-                        {'text': 'Open', 'anchor': tk.W},
-                        {'text': 'Tags', 'anchor': tk.W},
-                        {'text': 'Size', 'anchor': tk.W},
-                        {'text': 'Last Modified', 'anchor': tk.W},
-                        {'text': 'Data', 'anchor': tk.W}),
-                    'columns': (
-                        {'width': 180, 'minwidth': 3, 'stretch': tk.NO, 'type': 'Entry', 'unique': True},
-                        {'width': 70, 'minwidth': 3, 'stretch': tk.NO},
-                        {'width': 70, 'minwidth': 3, 'stretch': tk.NO},
-                        {'width': 70, 'minwidth': 3, 'stretch': tk.NO},
-                        # {'width': 120, 'minwidth': 3, 'stretch': tk.NO},
-                        {'width': 120, 'minwidth': 3, 'stretch': tk.NO, 'type': 'Entry'},
-                        {'width': 80, 'minwidth': 3, 'stretch': tk.NO},
-                        # {'width': 130, 'minwidth': 3, 'stretch': tk.NO},
-                        {'width': 130, 'minwidth': 3, 'stretch': tk.NO, 'type': 'Combobox',
-                            'values': ('Value 1', 'Value 2', 'Value 3', 'Value 4', 'Value 5'),
-                         },
-                        {'width': 180, 'minwidth': 3, 'stretch': tk.YES, 'type': 'Combobox',
-                            'values': ('Value 1', 'Value 2', 'Value 3', 'Value 4', 'Value 5'),
-                         },
-                    )}
-
-            show_dialog = True if 'data' not in setup else False
-            tree = self.treeview = Treeview(self.frame, setup=setup)
+                setup = default_setup()
+                self.journal.clear()
+
+            show_dialog = not stream or not stream.data
+            tree = self.treeview = Treeview(
+                self.frame, setup=setup, model=True,
+                lazy=self.app_data.get('lazy', False), virtual=self.app_data.get('virtual', False),
+                fit=self.app_data.get('fit'), collisions=self.app_data.get('collisions', 'ask'),
+                trace=self.app_data.get('trace', False), budget=self.app_data.get('budget', WATCHDOG_BUDGET))
             tree.grid(row=0, column=0, sticky=tk.NSEW)
 
             if show_dialog:
@@ -142,53 +216,117 @@ class App(tk.Tk):
                         )}
                     test_items.append(data)
                 tree.populate('', test_items)
-                tree.tags_reset()
-
-            settings = dict(setup.get('settings', ()))
-
-            view = settings.get('view')
-            if view:
-                tree.xview('moveto', view[0])
-                tree.yview('moveto', view[1])
-
-            tree.focus_set()
-            if tree.get_children():
-                tree.see(tree.get_children()[0])
-
-            item = settings.get('focus')
-            if (not item or not tree.exists(item)) and tree.get_children():
-                item = tree.get_children()[0]
-            if item:
-                tree.focus(item)
-                tree.selection_add(item)
-                tree.grid(sticky=tk.NSEW, row=0, column=0)
+                loaded()
+            else:
+                progress = ttk.Progressbar(self.frame, maximum=1.0)
+                progress.grid(row=1, column=0, sticky=tk.EW)
+                tree.load(
+                    stream.items(lambda _item: not tree.lazy or int(_item.get('open', 0))),
+                    progress=lambda: progress.configure(value=stream.progress),
+                    done=loaded,
+                )
 
         setup_app()
         setup_treeview()
 
     def exit(self):
         self.app_data.update({'geometry': self.geometry()})
+        self.treeview.trace_log()
+        self.treeview.latency_log()
+        if self.treeview.watchdog:
+            self.treeview.watchdog.stop()
 
         self.save()
         self.destroy()
 
-    def save(self):
+    def save(self, background=False, progress=None, done=None):
+        def write(report=None):
+            temp = file.with_suffix('.tmp')
+            if data is not None:
+                store = Snapshot if file.suffix == SNAPSHOT_SUFFIX else JsonStream
+                store.write(temp, header, data['data'], report)
+            elif file.suffix == SNAPSHOT_SUFFIX:
+                Snapshot.write(temp, header, self.treeview.serialize_items())
+            else:
+                with open(str(temp), 'w') as f:
+                    f.writelines(self.treeview.serialize_iter(settings))
+            temp.replace(file)
+
+        def work():
+            try:
+                write(lambda fraction: results.put(('progress', fraction)))
+                results.put(('done', None))
+            except Exception as error:
+                results.put(('done', error))
+
+        def poll():
+            while True:
+                try:
+                    op, value = results.get_nowait()
+                except queue.Empty:
+                    self.after(SAVE_POLL, poll)
+                    return
+
+                if op == 'progress':
+                    if progress:
+                        progress(value)
+                    continue
+
+                self.saver = None
+                if value is None:
+                    self.journal.commit()
+                if done:
+                    done(value)
+                elif value is not None:
+                    raise value
+                return
+
         file = _path.joinpath('app.json')
         with open(str(file), 'w') as f:
             json.dump(self.app_data, f, indent=3)
 
-        file = _path.joinpath('treeview.json')
-        with open(str(file), 'w') as f:
-            data = self.treeview.serialize()
-            data['settings'] = tuple({
-                'view': (self.treeview.xview()[0], self.treeview.yview()[0]),
-                'focus': self.treeview.focus()
-            }.items())
+        if self.treeview.loading:
+            self.after_cancel(self.treeview.loading)
+            return
+
+        if self.saver:
+            if background:
+                return
+            self.saver.join()
+
+        for idx, c in enumerate(self.treeview.columns):
+            c['width'] = self.treeview.column(f'#{idx}', 'width')
+
+        settings = tuple({
+            'view': (self.treeview.xview()[0], self.treeview.yview()[0]),
+            'focus': self.treeview.focus()
+        }.items())
+
+        header = {'headings': self.treeview.headings, 'columns': [dict(c) for c in self.treeview.columns],
+                  'settings': settings}
+        file = _path.joinpath(self.app_data.get('snapshot', 'treeview.json'))
+        self.journal.rotate()
+
+        if not background:
+            data = None
+            write()
+            self.journal.commit()
+            if done:
+                done(None)
+            return
+
+        data = self.treeview.serialize()
+        results = queue.Queue()
+        self.saver = threading.Thread(target=work, daemon=True)
+        self.saver.start()
+        self.after(SAVE_POLL, poll)
 
-            for idx, c in enumerate(self.treeview.columns):
-                c['width'] = self.treeview.column(f'#{idx}', 'width')
+    def autosave(self):
+        self.journal.flush()
+        if len(self.journal) > JOURNAL_LIMIT:
+            self.save(background=True)
 
-            json.dump(data, f, indent=3)
+        self.after(AUTOSAVE, self.autosave)
 
     def dlg_populate_tree(self, title, message, count=100):
         def okay(_=None):
@@ -509,6 +647,886 @@ class Scrollbar(ttk.Scrollbar):
             self.callback(self)
 
 
+class TclCounter:
+    IDLE = '(idle)'
+
+    def __init__(self, tk_app, trace=False):
+        self.tk_app = tk_app
+        self.count = 0
+        self.action = None
+        self.runs = {}
+        self.trace = {} if trace else None
+
+    def __getattr__(self, name):
+        return getattr(self.tk_app, name)
+
+    def view(self, widget, cls):
+        view = cls.__new__(cls)
+        view.tk, view._w, view.master = self, widget._w, widget.master
+        return view
+
+    def call(self, *args):
+        self.count += 1
+        if self.trace is None:
+            return self.tk_app.call(*args)
+
+        start = perf_counter()
+        try:
+            return self.tk_app.call(*args)
+        finally:
+            elapsed = perf_counter() - start
+            command = str(args[1] if len(args) > 1 and str(args[0]).startswith('.') else args[0])
+            stats = self.trace.setdefault(self.action or self.IDLE, {}).setdefault(command, [0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+
+    def run(self, action):
+        if self.trace is not None:
+            self.runs[action] = self.runs.get(action, 0) + 1
+
+    def report(self, top=5):
+        rows = []
+        for action, commands in self.trace.items():
+            calls = sum(count for count, _ in commands.values())
+            seconds = sum(elapsed for _, elapsed in commands.values())
+            runs = self.runs.get(action, 0)
+            busiest = sorted(commands.items(), key=lambda _item: -_item[1][0])[:top]
+            rows.append((calls / (runs or 1), action, runs, calls, seconds,
+                         ', '.join(f'{command} {count}' for command, (count, _) in busiest)))
+
+        lines = [f'{"action":<32} {"runs":>6} {"calls":>9} {"calls/run":>10} {"seconds":>9}  commands']
+        for per_run, action, runs, calls, seconds, busiest in sorted(rows, reverse=True):
+            lines.append(f'{action:<32} {runs:>6} {calls:>9} {per_run:>10.1f} {seconds:>9.3f}  {busiest}')
+
+        return '\n'.join(lines)
+
+
+class Watchdog:
+    BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+    LOOP = '(event loop lag)'
+
+    def __init__(self, widget, budget=WATCHDOG_BUDGET, interval=WATCHDOG_INTERVAL):
+        self.widget = widget
+        self.budget = budget / 1000
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.histograms = {}
+        self.active = None
+        self.stack = None
+        self.expected = None
+        self.heartbeat_id = None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.watch, daemon=True)
+
+    def start(self):
+        self.heartbeat()
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.heartbeat_id:
+            self.widget.after_cancel(self.heartbeat_id)
+            self.heartbeat_id = None
+
+    def record(self, name, elapsed):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = {'count': 0, 'total': 0.0, 'max': 0.0,
+                                                 'buckets': [0] * (len(self.BUCKETS) + 1)}
+        histogram['count'] += 1
+        histogram['total'] += elapsed
+        histogram['max'] = max(histogram['max'], elapsed)
+        histogram['buckets'][bisect_left(self.BUCKETS, elapsed * 1000)] += 1
+
+    def slow(self, name, elapsed):
+        stack, self.stack = self.stack, None
+        log.warning('%s took %.0f ms, the budget is %.0f ms%s', name, elapsed * 1000, self.budget * 1000,
+                    f'\n{stack}' if stack else '')
+
+    def heartbeat(self):
+        now = perf_counter()
+        if self.expected is not None:
+            lag = max(now - self.expected, 0.0)
+            self.record(self.LOOP, lag)
+            if lag > self.budget:
+                self.slow(self.LOOP, lag)
+
+        self.stack = None
+        self.expected = now + self.interval
+        self.heartbeat_id = self.widget.after(int(self.interval * 1000), self.heartbeat)
+
+    def wrap(self, name, callback):
+        def run(*args):
+            start = perf_counter()
+            previous, self.active = self.active, (name, start)
+            try:
+                return callback(*args)
+            finally:
+                self.active = previous
+                elapsed = perf_counter() - start
+                self.record(name, elapsed)
+                if elapsed > self.budget:
+                    self.slow(name, elapsed)
+
+        return run
+
+    def watch(self):
+        sampled = None
+        while not self.stopped.wait(self.budget / 2):
+            now = perf_counter()
+            active, expected = self.active, self.expected
+            if active is not None and active is not sampled and now - active[1] > self.budget:
+                sampled = active
+            elif active is None and expected is not None and expected != sampled and now - expected > self.budget:
+                sampled = expected
+            else:
+                continue
+
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stack = ''.join(traceback.format_stack(frame, limit=12))
+
+    def report(self):
+        buckets = ' '.join(f'{"<" + str(bucket):>6}' for bucket in self.BUCKETS)
+        buckets += f' {">" + str(self.BUCKETS[-1]):>6}'
+        lines = [f'{"handler":<40} {"runs":>6} {"mean ms":>8} {"max ms":>8}  {buckets}']
+        for name, histogram in sorted(self.histograms.items(), key=lambda _item: -_item[1]['max']):
+            mean = histogram['total'] / histogram['count'] * 1000
+            counts = ' '.join(f'{count:>6}' for count in histogram['buckets'])
+            lines.append(f'{name:<40} {histogram["count"]:>6} {mean:>8.1f} {histogram["max"] * 1000:>8.1f}  {counts}')
+
+        return '\n'.join(lines)
+
+
+class History:
+    def __init__(self, limit=HISTORY_LIMIT):
+        self.limit = limit
+        self.done = deque()
+        self.undone = []
+        self.size = 0
+        self.depth = 0
+        self.step = None
+        self.paused = False
+        self.refs = {}
+
+    def __len__(self):
+        return len(self.done)
+
+    def link(self, step, count):
+        for forward, inverse, _ in step:
+            for entry in (forward, *inverse):
+                for key in ('iid', 'parent'):
+                    item = entry.get(key)
+                    if item:
+                        refs = self.refs[item] = self.refs.get(item, 0) + count
+                        if not refs:
+                            del self.refs[item]
+
+    @staticmethod
+    def cost(step):
+        return sum(cost for _, _, cost in step)
+
+    def begin(self):
+        self.depth += 1
+        if self.depth == 1:
+            self.step = []
+
+    def end(self):
+        self.depth -= 1
+        if not self.depth:
+            step, self.step = self.step, None
+            if step:
+                self.push(step)
+
+    def record(self, forward, inverse, cost=1):
+        if self.paused:
+            return
+
+        self.link([(forward, inverse, cost)], 1)
+        if self.step is not None:
+            self.step.append((forward, inverse, cost))
+        else:
+            self.push([(forward, inverse, cost)])
+
+    def push(self, step):
+        for undone in self.undone:
+            self.size -= self.cost(undone)
+            self.link(undone, -1)
+        self.undone = []
+        self.done.append(step)
+        self.size += self.cost(step)
+        while self.size > self.limit and len(self.done) > 1:
+            evicted = self.done.popleft()
+            self.size -= self.cost(evicted)
+            self.link(evicted, -1)
+
+    def clear(self):
+        self.done.clear()
+        self.undone = []
+        self.size = 0
+        self.refs = {}
+        if self.step:
+            self.link(self.step, 1)
+
+    def undo(self):
+        if not self.done:
+            return None
+
+        step = self.done.pop()
+        self.undone.append(step)
+        entries = []
+        for _, inverse, _ in reversed(step):
+            for entry in inverse:
+                if entry['op'] == 'delete' and entries and entries[-1]['op'] == 'delete':
+                    entries[-1]['items'].extend(entry['items'])
+                elif entry['op'] == 'delete':
+                    entries.append(dict(entry, items=list(entry['items'])))
+                else:
+                    entries.append(entry)
+
+        return entries
+
+    def redo(self):
+        if not self.undone:
+            return None
+
+        step = self.undone.pop()
+        self.done.append(step)
+        return [forward for forward, _, _ in step]
+
+
+class Journal:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.backup = self.path.with_name(self.path.name + '.old')
+        self.entries = []
+        self.size = 0
+
+    def __len__(self):
+        return self.size + len(self.entries)
+
+    def record(self, op, **data):
+        self.entries.append(dict(op=op, **data))
+
+    def flush(self):
+        if not self.entries:
+            return
+
+        with open(str(self.path), 'a') as f:
+            for entry in self.entries:
+                f.write(json.dumps(entry) + '\n')
+        self.size += len(self.entries)
+        self.entries = []
+
+    def clear(self):
+        self.entries = []
+        self.size = 0
+        for path in (self.backup, self.path):
+            if path.exists():
+                path.unlink()
+
+    def rotate(self):
+        self.flush()
+        self.size = 0
+        if not self.path.exists():
+            return
+
+        if self.backup.exists():
+            with open(str(self.backup), 'a') as f, open(str(self.path)) as current:
+                f.write(current.read())
+            self.path.unlink()
+        else:
+            self.path.replace(self.backup)
+
+    def commit(self):
+        if self.backup.exists():
+            self.backup.unlink()
+
+    def read(self):
+        for path in (self.backup, self.path):
+            if not path.exists():
+                continue
+
+            with open(str(path), 'rb') as f:
+                offset = 0
+                for number, line in enumerate(f, 1):
+                    try:
+                        entry = json.loads(line) if line.strip() else None
+                    except ValueError:
+                        log.warning('%s line %d is not a complete entry, replay stops there', path, number)
+                        f.close()
+                        with open(str(path), 'r+b') as journal:
+                            journal.truncate(offset)
+                        return
+
+                    offset += len(line)
+                    if entry is not None:
+                        self.size += 1
+                        yield entry
+
+
+class JsonStream:
+    def __init__(self, path, chunk=LOAD_CHUNK):
+        self.file = open(str(path))
+        self.size = max(Path(path).stat().st_size, 1)
+        self.chunk = chunk
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.consumed = 0
+        self.eof = False
+        self.data = False
+        self.tail = {}
+
+    @property
+    def progress(self):
+        return min((self.consumed + self.pos) / self.size, 1.0)
+
+    def close(self):
+        self.file.close()
+
+    def fill(self, size=0):
+        data = self.file.read(max(size, self.chunk))
+        self.consumed += self.pos
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+        self.eof = not data
+
+        return bool(data)
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.fill():
+                break
+
+        return self.buffer[self.pos:self.pos + 1]
+
+    def take(self, expected):
+        char = self.peek()
+        if not char or char not in expected:
+            raise ValueError(f'Expected {expected!r} at offset {self.consumed + self.pos}, found {char!r}')
+
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill(len(self.buffer) - self.pos)
+
+    def header(self):
+        header = {}
+        self.take('{')
+        if self.peek() == '}':
+            return header
+
+        while True:
+            key = self.value()
+            self.take(':')
+            if key == 'data':
+                self.take('[')
+                self.data = True
+                return header
+
+            header[key] = self.value()
+            if self.take(',}') == '}':
+                return header
+
+    def items(self, expand=None):
+        def array():
+            if self.peek() == ']':
+                self.take(']')
+                return
+
+            while True:
+                yield from element()
+                if self.take(',]') == ']':
+                    return
+
+        def element():
+            item = {}
+            extra = None
+            if self.take('{') and self.peek() == '}':
+                self.take('}')
+            else:
+                while True:
+                    key = self.value()
+                    self.take(':')
+                    if key == 'children' and extra is None and (expand is None or expand(item)):
+                        self.take('[')
+                        yield 'item', item
+                        yield 'push', item
+                        yield from array()
+                        yield 'pop', None
+                        item = extra = {}
+                    else:
+                        item[key] = self.value()
+                    if self.take(',}') == '}':
+                        break
+
+            if extra is None:
+                yield 'item', item
+
+        if not self.data:
+            return
+
+        yield from array()
+        while self.take(',}') == ',':
+            key = self.value()
+            self.take(':')
+            self.tail[key] = self.value()
+
+    @classmethod
+    def write(cls, path, header, data, progress=None):
+        with open(str(path), 'w') as f:
+            f.write('{')
+            for key, value in header.items():
+                if key != 'settings':
+                    f.write(f'{json.dumps(key)}: {json.dumps(value)}, ')
+
+            f.write('"data": [')
+            for idx, item in enumerate(data):
+                if idx:
+                    f.write(', ')
+                f.write(json.dumps(item))
+                if progress and not idx % LOAD_BATCH:
+                    progress(idx / len(data))
+            f.write('], "settings": ' + json.dumps(header.get('settings', ())) + '}')
+
+
+class Snapshot:
+    MAGIC = b'TVSNAP1\0'
+    MISSING = 0xFFFFFFFF
+    VALUES, TAGS, LAZY, CHILDREN, SCALAR_VALUES, SCALAR_TAGS = 1, 2, 4, 8, 16, 32
+
+    def __init__(self, path):
+        with open(str(path), 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(self.MAGIC)] != self.MAGIC:
+            self.map.close()
+            raise ValueError(f'{path} is not a treeview snapshot')
+
+        self.views = []
+        self.offset = len(self.MAGIC)
+        self.meta = json.loads(bytes(self.section()).decode())
+        offsets = self.section('I')
+        blob = self.section()
+        self.strings = [json.loads(bytes(blob[offsets[idx]:offsets[idx + 1]]).decode())
+                        for idx in range(len(offsets) - 1)]
+        self.parents = self.section('i')
+        self.text, self.image, self.open, self.iid = (self.section('I') for _ in range(4))
+        self.flags = self.section('B')
+        self.value_offsets, self.value_ids, self.tag_offsets, self.tag_ids = (self.section('I') for _ in range(4))
+
+        self.count = len(self.parents)
+        self.index = 0
+        self.data = bool(self.count)
+        self.tail = {}
+
+    @property
+    def progress(self):
+        return self.index / self.count if self.count else 1.0
+
+    def section(self, typecode=None):
+        size, = struct.unpack_from('<I', self.map, self.offset)
+        start = self.offset + 4
+        self.offset = start + size + -size % 4
+        self.views.append(memoryview(self.map))
+        self.views.append(self.views[-1][start:start + size])
+        if typecode is None:
+            return self.views[-1]
+        if byteorder == 'big' and typecode != 'B':
+            data = array(typecode, self.views[-1].tobytes())
+            data.byteswap()
+            return data
+
+        self.views.append(self.views[-1].cast(typecode))
+        return self.views[-1]
+
+    def close(self):
+        while self.views:
+            self.views.pop().release()
+        self.map.close()
+
+    def header(self):
+        return dict(self.meta)
+
+    def item(self, idx):
+        item = {}
+        strings = self.strings
+        for key, ids in (('text', self.text), ('image', self.image), ('open', self.open), ('iid', self.iid)):
+            if ids[idx] != self.MISSING:
+                item[key] = strings[ids[idx]]
+
+        flags = self.flags[idx]
+        if flags & self.VALUES:
+            item['values'] = [strings[i] for i in self.value_ids[self.value_offsets[idx]:self.value_offsets[idx + 1]]]
+            if flags & self.SCALAR_VALUES:
+                item['values'] = item['values'][0]
+        if flags & self.TAGS:
+            item['tags'] = [strings[i] for i in self.tag_ids[self.tag_offsets[idx]:self.tag_offsets[idx + 1]]]
+            if flags & self.SCALAR_TAGS:
+                item['tags'] = item['tags'][0]
+        if flags & self.LAZY:
+            item['lazy'] = True
+
+        return item
+
+    def subtree(self, idx):
+        items = {idx: []}
+        end = idx + 1
+        while end < self.count and self.parents[end] >= idx:
+            item = self.item(end)
+            if self.flags[end] & self.CHILDREN:
+                item['children'] = items[end] = []
+            items[self.parents[end]].append(item)
+            end += 1
+
+        return items[idx], end
+
+    def items(self, expand=None):
+        stack = []
+        idx = 0
+        while idx < self.count:
+            parent = self.parents[idx]
+            while stack and stack[-1] != parent:
+                stack.pop()
+                yield 'pop', None
+
+            item = self.item(idx)
+            self.index = idx
+            idx += 1
+            if not self.flags[idx - 1] & self.CHILDREN:
+                yield 'item', item
+            elif expand is None or expand(item):
+                yield 'item', item
+                yield 'push', item
+                stack.append(idx - 1)
+            else:
+                item['children'], idx = self.subtree(idx - 1)
+                yield 'item', item
+
+        for _ in stack:
+            yield 'pop', None
+        self.index = self.count
+
+    @classmethod
+    def write(cls, path, header, data, progress=None):
+        def intern(value):
+            key = value
+            if value.__class__ is not str:
+                key = (value.__class__, tuple(value) if isinstance(value, list) else value)
+            idx = strings.get(key)
+            if idx is None:
+                idx = strings[key] = len(strings)
+                blob.extend(json.dumps(value).encode())
+                offsets.append(len(blob))
+            return idx
+
+        def walk(items, parent):
+            top = 0
+            stack = [(parent, iter(items))]
+            while stack:
+                parent, children = stack[-1]
+                item = next(children, None)
+                if item is None:
+                    stack.pop()
+                    continue
+
+                if len(stack) == 1:
+                    if progress and not top % LOAD_BATCH:
+                        progress(top / len(items))
+                    top += 1
+
+                idx = len(parents)
+                parents.append(parent)
+                for key, ids in (('text', text), ('image', image), ('open', opened), ('iid', iid)):
+                    ids.append(intern(item[key]) if key in item else cls.MISSING)
+
+                flag = 0
+                for key, ids, present, scalar in (('values', value_ids, cls.VALUES, cls.SCALAR_VALUES),
+                                                  ('tags', tag_ids, cls.TAGS, cls.SCALAR_TAGS)):
+                    if key not in item:
+                        continue
+
+                    flag |= present
+                    if isinstance(item[key], (list, tuple)):
+                        ids.extend(intern(value) for value in item[key])
+                    else:
+                        flag |= scalar
+                        ids.append(intern(item[key]))
+                if item.get('lazy'):
+                    flag |= cls.LAZY
+                if 'children' in item:
+                    flag |= cls.CHILDREN
+                    stack.append((idx, iter(item['children'])))
+                flags.append(flag)
+                value_offsets.append(len(value_ids))
+                tag_offsets.append(len(tag_ids))
+
+        strings = {}
+        blob = bytearray()
+        offsets = array('I', [0])
+        parents = array('i')
+        text, image, opened, iid, value_ids, tag_ids = (array('I') for _ in range(6))
+        value_offsets, tag_offsets = array('I', [0]), array('I', [0])
+        flags = array('B')
+        walk(data, -1)
+
+        with open(str(path), 'wb') as f:
+            f.write(cls.MAGIC)
+            for section in (json.dumps(header).encode(), offsets, blob, parents, text, image, opened, iid,
+                            flags, value_offsets, value_ids, tag_offsets, tag_ids):
+                if isinstance(section, array) and byteorder == 'big' and section.typecode != 'B':
+                    section = array(section.typecode, section)
+                    section.byteswap()
+                payload = section.tobytes() if isinstance(section, array) else bytes(section)
+                f.write(struct.pack('<I', len(payload)))
+                f.write(payload)
+                f.write(bytes(-len(payload) % 4))
+
+
+class TextWidths:
+    def __init__(self, size=TEXT_CACHE):
+        self.size = size
+        self.widths = OrderedDict()
+
+    def measure(self, font, text):
+        key = (str(font), text)
+        width = self.widths.get(key)
+        if width is None:
+            width = self.widths[key] = font.measure(text)
+            if len(self.widths) > self.size:
+                self.widths.popitem(last=False)
+        else:
+            self.widths.move_to_end(key)
+
+        return width
+
+
+class TagIndex:
+    def __init__(self):
+        self.tags = {}
+        self.items = {}
+
+    def set(self, item, tags):
+        if isinstance(tags, str):
+            tags = tags.split()
+        tags = tuple(str(tag) for tag in tags)
+        previous = self.items.get(item, ())
+        if tags == previous:
+            return
+
+        for tag in previous:
+            if tag not in tags:
+                self.tag_discard(tag, item)
+        for tag in tags:
+            self.tags.setdefault(tag, {})[item] = None
+
+        if tags:
+            self.items[item] = tags
+        else:
+            del self.items[item]
+
+    def discard(self, item):
+        for tag in self.items.pop(item, ()):
+            self.tag_discard(tag, item)
+
+    def tag_discard(self, tag, item):
+        items = self.tags[tag]
+        items.pop(item, None)
+        if not items:
+            del self.tags[tag]
+
+    def has(self, tag, item=None):
+        if item is None:
+            return tuple(self.tags.get(tag, ()))
+
+        return tag in self.items.get(item, ())
+
+
+class SearchIndex:
+    def __init__(self):
+        self.tokens = {}
+        self.items = {}
+        self.words = []
+
+    @staticmethod
+    def split(text):
+        return re.findall(r'\w+', str(text).lower())
+
+    def words_of(self, texts):
+        words = set()
+        for text in texts:
+            words.update(self.split(text))
+
+        return frozenset(words)
+
+    def build(self, items):
+        for item, texts in items:
+            words = self.items[item] = self.words_of(texts)
+            for word in words:
+                self.tokens.setdefault(word, set()).add(item)
+        self.words = sorted(self.tokens)
+
+    def add(self, item, texts):
+        words = self.words_of(texts)
+        previous = self.items.get(item, frozenset())
+        if words == previous:
+            return
+
+        self.items[item] = words
+        for word in previous - words:
+            self.word_discard(word, item)
+        for word in words - previous:
+            items = self.tokens.get(word)
+            if items is None:
+                items = self.tokens[word] = set()
+                insort(self.words, word)
+            items.add(item)
+
+    def discard(self, item):
+        for word in self.items.pop(item, ()):
+            self.word_discard(word, item)
+
+    def word_discard(self, word, item):
+        items = self.tokens[word]
+        items.discard(item)
+        if not items:
+            del self.tokens[word]
+            del self.words[bisect_left(self.words, word)]
+
+    def prefix(self, prefix):
+        items = set()
+        for word in islice(self.words, bisect_left(self.words, prefix), None):
+            if not word.startswith(prefix):
+                break
+            items |= self.tokens[word]
+
+        return items
+
+    def search(self, query):
+        words = self.split(query)
+        if not words:
+            return set()
+
+        found = [self.tokens.get(word, set()) for word in words]
+        if not query[-1].isspace():
+            found[-1] = self.prefix(words[-1])
+        found.sort(key=len)
+
+        items = set(found[0])
+        for _items in found[1:]:
+            if not items:
+                break
+            items &= _items
+
+        return items
+
+
+class Clipboard:
+    FORMAT = 'tkinter-treeview'
+    Item = namedtuple('Item', ('text', 'image', 'values', 'open', 'tags', 'children'))
+
+    def __init__(self, items=(), text=None):
+        self.items = tuple(items)
+        self.text = text
+        self.count = 0
+        stack = list(self.items)
+        while stack:
+            self.count += 1
+            stack.extend(stack.pop().children)
+
+    def __len__(self):
+        return self.count
+
+    @staticmethod
+    def data(item):
+        return {'text': item.text, 'image': item.image, 'values': list(item.values), 'open': item.open,
+                'tags': list(item.tags)}
+
+    def dumps(self):
+        def encode(_item):
+            data = self.data(_item)
+            if _item.children:
+                data['children'] = [encode(child) for child in _item.children]
+            return data
+
+        if self.text is None:
+            self.text = json.dumps({'format': self.FORMAT, 'items': [encode(item) for item in self.items]})
+
+        return self.text
+
+    @classmethod
+    def loads(cls, text):
+        def decode(_data):
+            children = tuple(decode(child) for child in _data.get('children', ()))
+            return cls.Item(_data.get('text', ''), _data.get('image', ''), tuple(_data.get('values', ())),
+                            _data.get('open', 0), tuple(_data.get('tags', ())), children)
+
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return None
+
+        if not isinstance(data, dict) or data.get('format') != cls.FORMAT:
+            return None
+
+        return cls((decode(item) for item in data.get('items', ())), text)
+
+
+class Node:
+    __slots__ = ('parent', 'depth', 'children', 'text', 'image', 'values', 'tags', 'open')
+
+    def __init__(self, parent='', depth=0, **kwargs):
+        self.parent = parent
+        self.depth = depth
+        self.children = []
+        self.text = ''
+        self.image = ''
+        self.values = ()
+        self.tags = ()
+        self.open = False
+
+        self.update(**kwargs)
+
+    def update(self, **kwargs):
+        for option, value in kwargs.items():
+            if option in ('values', 'tags'):
+                value = tuple(str(v) for v in (value.split() if isinstance(value, str) else value))
+            elif option == 'open':
+                value = str(value).lower() in ('1', 'true', 'yes', 'on')
+            elif option == 'text':
+                value = str(value)
+            elif option != 'image':
+                continue
+
+            setattr(self, option, value)
+
+    def get(self, option):
+        value = getattr(self, option)
+        return int(value) if option == 'open' else value
+
+    def options(self):
+        return {
+            'text': self.text,
+            'image': self.image,
+            'values': list(self.values),
+            'open': int(self.open),
+            'tags': list(self.tags),
+        }
+
+
 class Treeview(ttk.Treeview):
     def __init__(self, parent, **kwargs):
         self.frame = Frame(parent)
@@ -520,14 +1538,64 @@ class Treeview(ttk.Treeview):
         self.columns = setup['columns']
         self.headings = setup['headings']
         self.scroll = kwargs.pop('scroll', (True, True))
+        self.lazy = kwargs.pop('lazy', False)
+        self.loader = kwargs.pop('loader', None)
+        self.virtual = kwargs.pop('virtual', False)
+        self.virtual_margin = kwargs.pop('margin', 10)
+        self.fit_mode = kwargs.pop('fit', None)
+        self.batching = kwargs.pop('batch', True)
+        self.collisions = kwargs.pop('collisions', 'ask')
+        trace = kwargs.pop('trace', False)
+        budget = kwargs.pop('budget', None)
+        self.nodes = {'': Node(open=True)} if kwargs.pop('model', False) or self.virtual else None
 
         super().__init__(self.frame, **kwargs)
-
+        self.tcl = TclCounter(self.tk, trace)
+        self.base = self.tcl.view(self, ttk.Treeview)
+        self.tcl_stats = {}
+        self.watchdog = Watchdog(self, budget) if budget else None
+        self.batch_depth = 0
+        self.batch_items = {}
+        self.batch_selection = []
+        self.refresh_pending = None
+        self.refresh_action = None
+        self.refresh_sizes = set()
+        self.pasting = None
+        self.paste_finish = None
+        self.refresh_reset = False
+
+        self.rows = []
+        self.rows_walk = None
+        self.rendered = set()
+        self.virtual_selection = set()
+        self.virtual_base = (0, 0, 0)
+        self.virtual_count = \
+            self.virtual_window = 0
+        self.virtual_focus = ''
+        self.virtual_pending = False
         self.detached = []
-
-        self.undo_data = {}
+        self.detached_roots = set()
+        self.clipboard = Clipboard()
+        self.history = History()
+        self.journal = None
+        self.loading = None
+        self.tag_index = TagIndex()
+        self.search_index = None
+        self.filter_query = None
+        self.filter_visible = None
+        self.filter_shown = {}
+        self.filter_dirty = False
+        self.filter_bar = None
+        self.filter_pending = None
+
+        self.names = {}
+        self.pending = {}
+        self.pending_parents = {}
+        self.stripes = {}
+        self.rows_index = {}
         self.menu_images = {}
         self.sorted_columns = {}
+        self.sort_order = []
 
         self.shift = \
             self.popup = \
@@ -540,6 +1608,7 @@ class Treeview(ttk.Treeview):
             self.active_popup_column = \
             self.menu_background = None
 
+        self.serial = 0
         self.cursor_offset = 0
         self.platform = parent.winfo_toplevel().platform
 
@@ -547,6 +1616,11 @@ class Treeview(ttk.Treeview):
         self.indent = self.style.lookup('Treeview', 'indent')
         self.rowheight = self.style.lookup('Treeview', 'rowheight')
         self.default_font = tkfont.nametofont('TkDefaultFont')
+        self.text_font = tkfont.nametofont('TkTextFont')
+        self.text_widths = TextWidths()
+        self.fit_indent = None
+        self.fit = {}
+        self.depths = {}
 
         if setup:
             self.setup(setup)
@@ -556,6 +1630,8 @@ class Treeview(ttk.Treeview):
 
         self.bindings_set()
         self.frame.grid(sticky=tk.NSEW)
+        if self.watchdog:
+            self.watchdog.start()
 
     def setup(self, setup):
         def set_style():
@@ -612,9 +1688,12 @@ class Treeview(ttk.Treeview):
             popup.add_separator()
             popup.add_command(label="Undo", command=self.undo, compound=tk.LEFT, accelerator='Ctrl+Z',
                               image=self.menu_images['undo'])
+            popup.add_command(label="Redo", command=self.redo, compound=tk.LEFT, accelerator='Ctrl+Y')
             popup.add_separator()
             popup.add_command(label="Delete", command=self.detach, compound=tk.LEFT, accelerator='Ctrl+D',
                               image=self.menu_images['delete'])
+            popup.add_separator()
+            popup.add_command(label="Filter", command=self.filter_show, compound=tk.LEFT, accelerator='Ctrl+/')
 
             create_new.add_command(
                 label="Folder", command=self.insert_node, compound=tk.LEFT, accelerator='Ctrl+F',
@@ -637,7 +1716,7 @@ class Treeview(ttk.Treeview):
                 sb_x.bind('<Button-5>', self.scrollbars_scroll)
 
             if scroll_y:
-                sb_y = self.scroll_y = Scrollbar(self.frame, callback=self.popup_widget_destroy)
+                sb_y = self.scroll_y = Scrollbar(self.frame, callback=self.view_changed)
                 sb_y.configure(command=self.yview)
                 self.configure(yscrollcommand=sb_y.set)
                 sb_y.grid(sticky=tk.NSEW, row=0, column=LAST_COLUMN)
@@ -645,6 +1724,9 @@ class Treeview(ttk.Treeview):
                 sb_y.bind('<Button-4>', self.scrollbars_scroll)
                 sb_y.bind('<Button-5>', self.scrollbars_scroll)
 
+            if self.virtual:
+                self.configure(yscrollcommand=self.virtual_scroll)
+
         def set_rows_columns():
             ids = []
             columns = ''
@@ -655,7 +1737,9 @@ class Treeview(ttk.Treeview):
 
             self["columns"] = ids
             for idx, cfg in enumerate(setup['headings']):
-                self.heading(f'#{idx}', text=cfg['text'], anchor=cfg['anchor'])
+                sort = self.handler(f'heading #{idx} sort_column',
+                                    lambda _column=f'#{idx}': self.sort_column(_column), edit=True)
+                self.heading(f'#{idx}', text=cfg['text'], anchor=cfg['anchor'], command=sort)
                 self.sorted_columns[f'#{idx}'] = True
 
             for idx, cfg in enumerate(setup['columns']):
@@ -665,26 +1749,448 @@ class Treeview(ttk.Treeview):
         set_popup_menu()
         set_scrollbars()
         set_rows_columns()
-        self.after(1, self.tags_reset)
+        self.refresh()
 
     def next(self, item):
         if self.item(item, 'open') and self.get_children(item):
             _next = self.get_children(item)[0]
             return _next
 
-        _next = super(Treeview, self).next(item)
+        _next = self.sibling(item, 1)
         if not _next and self.next(self.parent(item)):
             _next = self.next(self.parent(item))
         return _next
 
     def prev(self, item):
-        _prev = super(Treeview, self).prev(item)
+        _prev = self.sibling(item, -1)
         if not _prev:
             parent = self.parent(item)
             _prev = parent if parent else ''
 
         return _prev
 
+    def sibling(self, item, step):
+        if self.nodes is None:
+            if step > 0:
+                return self.base.next(item)
+            return self.base.prev(item)
+
+        parent = self.node(item).parent
+        if parent is None:
+            return ''
+
+        siblings = self.nodes[parent].children
+        idx = siblings.index(item) + step
+        return siblings[idx] if 0 <= idx < len(siblings) else ''
+
+    def node(self, item):
+        try:
+            return self.nodes[item]
+        except KeyError:
+            raise tk.TclError(f'Item {item} not found') from None
+
+    def item(self, item, option=None, **kw):
+        if kw.get('open') and item in self.pending:
+            self.lazy_load(item)
+        if kw:
+            self.item_record(item, kw)
+        if 'tags' in kw:
+            self.tag_index.set(item, kw['tags'])
+        if self.search_index is not None and ('text' in kw or 'values' in kw):
+            self.search_index.add(item, self.search_texts(item, kw))
+        if kw and self.fit:
+            self.fit_update(item, kw)
+
+        if self.nodes is None:
+            return self.base.item(item, option, **kw)
+
+        node = self.node(item)
+        if kw:
+            if not self.virtual or item in self.rendered:
+                self.item_write(item, kw)
+            node.update(**kw)
+            if 'open' in kw:
+                self.rows_invalidate(item)
+                self.virtual_schedule()
+        elif option is not None:
+            return node.get(option)
+        else:
+            return node.options()
+
+    def item_write(self, item, kw):
+        if self.batch_depth and self.batching and 'open' not in kw:
+            self.batch_items.setdefault(item, {}).update(kw)
+            return
+
+        if item in self.batch_items:
+            kw = dict(self.batch_items.pop(item), **kw)
+        self.base.item(item, **kw)
+
+    @contextmanager
+    def batch(self, name=None):
+        count = self.tcl.count
+        self.batch_depth += 1
+        self.history.begin()
+        try:
+            yield
+        finally:
+            self.batch_depth -= 1
+            if not self.batch_depth:
+                self.batch_flush()
+            self.history.end()
+            if name:
+                self.tcl_stats[name] = self.tcl.count - count
+
+    def batch_flush(self):
+        if self.batch_items:
+            data = []
+            for item, kw in self.batch_items.items():
+                data.extend((item, ttk._format_optdict(kw)))
+            self.batch_items = {}
+            self.tcl.call('foreach', ('iid', 'options'), tuple(data),
+                         f'if {{[{self._w} exists $iid]}} {{{self._w} item $iid {{*}}$options}}')
+
+        selection, self.batch_selection = self.batch_selection, []
+        for op, items in selection:
+            getattr(self.base, f'selection_{op}')(items)
+
+    def selection(self):
+        def path(item):
+            keys = []
+            parent = self.nodes[item].parent
+            while item and parent is not None:
+                if parent not in positions:
+                    positions[parent] = {child: idx for idx, child in enumerate(self.nodes[parent].children)}
+                keys.append(positions[parent][item])
+                item, parent = parent, self.nodes[parent].parent
+
+            return keys[::-1]
+
+        if self.batch_selection:
+            self.batch_flush()
+        if not self.virtual:
+            return self.base.selection()
+
+        positions = {}
+        return tuple(sorted((item for item in self.virtual_selected() if item in self.nodes), key=path))
+
+    def tag_has(self, tagname, item=None):
+        return self.tag_index.has(tagname, item)
+
+    def parent(self, item):
+        if self.nodes is None:
+            return self.base.parent(item)
+
+        return self.node(item).parent or ''
+
+    def get_children(self, item=None):
+        if self.nodes is None:
+            return () if item in self.pending else self.base.get_children(item)
+
+        return tuple(self.node(item or '').children)
+
+    def exists(self, item):
+        if self.nodes is None:
+            return self.base.exists(item)
+
+        return item in self.nodes
+
+    def index(self, item):
+        if self.nodes is None:
+            return self.base.index(item)
+
+        parent = self.node(item).parent
+        return 0 if parent is None else self.nodes[parent].children.index(item)
+
+    def see(self, item):
+        if self.virtual:
+            return self.virtual_see(item)
+
+        self.base.see(item)
+        if self.nodes is None:
+            return
+
+        parent = self.parent(item)
+        while parent:
+            node = self.nodes[parent]
+            if not node.open:
+                node.open = True
+                self.rows_invalidate(parent)
+                self.fit.clear()
+            parent = node.parent
+
+    def focus(self, item=None):
+        if not self.virtual:
+            return self.base.focus(item)
+
+        if item is None:
+            focus = self.base.focus()
+            return focus if focus or self.virtual_focus not in self.nodes else self.virtual_focus
+
+        self.virtual_focus = item
+        if item and item not in self.rendered:
+            self.virtual_see(item)
+            self.virtual_flush()
+        if not item or item in self.rendered:
+            self.base.focus(item)
+
+    def selection_set(self, *items):
+        self.virtual_select('set', items)
+
+    def selection_add(self, *items):
+        self.virtual_select('add', items)
+
+    def selection_remove(self, *items):
+        self.virtual_select('remove', items)
+
+    def selection_toggle(self, *items):
+        self.virtual_select('toggle', items)
+
+    def virtual_select(self, op, items):
+        if len(items) == 1 and isinstance(items[0], (tuple, list)):
+            items = items[0]
+
+        if self.virtual:
+            selected = self.virtual_selected()
+            if op == 'set':
+                selected.clear()
+                selected.update(items)
+            elif op == 'add':
+                selected.update(items)
+            elif op == 'remove':
+                selected.difference_update(items)
+            else:
+                selected.symmetric_difference_update(items)
+            items = [item for item in items if item in self.rendered]
+
+        if not (self.batch_depth and self.batching):
+            getattr(self.base, f'selection_{op}')(items)
+        elif op == 'set':
+            self.batch_selection = [(op, list(items))]
+        elif self.batch_selection and self.batch_selection[-1][0] == op:
+            self.batch_selection[-1][1].extend(items)
+        else:
+            self.batch_selection.append((op, list(items)))
+
+    def virtual_selected(self):
+        if self.batch_selection:
+            self.batch_flush()
+
+        self.virtual_selection -= self.rendered
+        self.virtual_selection.update(self.base.selection())
+        return self.virtual_selection
+
+    def yview(self, *args):
+        if not self.virtual:
+            return self.base.yview(*args)
+
+        self.rows_build()
+        total = len(self.rows)
+        count = self.viewport_count()
+        if not args:
+            if not total:
+                return 0.0, 1.0
+            return self.virtual_window / total, min((self.virtual_window + count - 1) / total, 1.0)
+
+        if args[0] == tk.MOVETO:
+            window = int(float(args[1]) * total)
+        else:
+            window = self.virtual_window + int(args[1]) * (count - 1 if args[2] == tk.PAGES else 1)
+
+        window = max(min(window, total - count + 1), 0)
+        if window != self.virtual_window:
+            self.virtual_window = window
+            self.virtual_schedule()
+
+    def yview_moveto(self, fraction):
+        self.yview(tk.MOVETO, fraction)
+
+    def yview_scroll(self, number, what):
+        self.yview(tk.SCROLL, number, what)
+
+    def virtual_see(self, item):
+        parent = self.parent(item)
+        while parent:
+            node = self.nodes[parent]
+            if not node.open:
+                self.item(parent, open=True)
+            parent = node.parent
+
+        self.rows_build(until=item)
+        idx = self.rows_index.get(item)
+        if idx is None:
+            return
+
+        count = self.viewport_count()
+        if idx < self.virtual_window:
+            self.virtual_window = idx
+        elif idx > self.virtual_window + count - 2:
+            self.virtual_window = idx - count + 2
+        self.virtual_schedule()
+
+    def virtual_schedule(self):
+        if self.virtual and not self.virtual_pending:
+            self.virtual_pending = True
+            self.after_idle(self.virtual_flush)
+
+    def virtual_flush(self):
+        if self.virtual_pending:
+            self.virtual_render()
+
+    def virtual_render(self):
+        self.virtual_pending = False
+        if not self.virtual:
+            return
+
+        count = self.virtual_count = self.viewport_count()
+        self.rows_build()
+        total = len(self.rows)
+        window = self.virtual_window = max(min(self.virtual_window, total - count + 1), 0)
+        start = max(window - self.virtual_margin, 0)
+        rows = self.rows[start:window + count + self.virtual_margin]
+
+        ancestors = []
+        parent = self.parent(rows[0]) if rows else ''
+        while parent:
+            ancestors.insert(0, parent)
+            parent = self.parent(parent)
+
+        focus = self.base.focus()
+        if focus in self.rendered:
+            self.virtual_focus = focus
+        selected = self.virtual_selected()
+
+        self.base.delete(*self.base.get_children())
+        self.rendered = set()
+
+        for idx, item in enumerate(rows, start):
+            self.stripe(item, 'even' if idx % 2 == 0 else 'odd')
+
+        for item in ancestors + rows:
+            node = self.nodes[item]
+            self.base.insert(node.parent or '', tk.END, iid=item, **node.options())
+            self.rendered.add(item)
+            if (node.children and not node.open) or item in self.pending:
+                self.base.insert(item, tk.END, iid=f'{item}{PLACEHOLDER}')
+
+        offset = len(ancestors) + window - start
+        self.base.yview(tk.MOVETO, 0)
+        if offset:
+            self.base.yview(tk.SCROLL, offset, tk.UNITS)
+        self.virtual_base = (start, len(ancestors), len(ancestors) + len(rows))
+
+        self.base.selection_set([item for item in selected if item in self.rendered])
+        if self.virtual_focus in self.rendered:
+            self.base.focus(self.virtual_focus)
+
+        if self.scroll_y:
+            self.scroll_y.set(*self.yview())
+
+    def virtual_remove(self, items):
+        for item in items:
+            if item in self.rendered and self.base.exists(item):
+                self.base.delete(item)
+        self.rendered = {item for item in self.rendered if self.base.exists(item)}
+
+    def virtual_scroll(self, low, high):
+        start, offset, size = self.virtual_base
+        window = start + round(float(low) * size) - offset
+        if window != self.virtual_window or self.viewport_count() != self.virtual_count:
+            self.virtual_window = max(window, 0)
+            self.virtual_schedule()
+        elif self.scroll_y:
+            self.scroll_y.set(*self.yview())
+
+    def node_insert(self, parent, index, iid, **kw):
+        if self.nodes is None:
+            return
+
+        self.nodes[iid] = Node(parent, self.nodes[parent].depth + 1, **kw)
+        children = self.nodes[parent].children
+        if index == tk.END:
+            children.append(iid)
+        else:
+            children.insert(max(int(index), 0), iid)
+        self.rows_walk = None
+        self.filter_dirty = True
+
+    def node_delete(self, item):
+        if self.nodes is None or item not in self.nodes:
+            return
+
+        self.node_detach(item)
+        nodes = [item]
+        while nodes:
+            node = self.nodes.pop(nodes.pop())
+            nodes.extend(node.children)
+
+    def node_detach(self, item):
+        if self.nodes is None:
+            return
+
+        node = self.nodes[item]
+        if node.parent is not None:
+            self.nodes[node.parent].children.remove(item)
+            node.parent = None
+        self.rows_walk = None
+        self.filter_dirty = True
+
+    def node_move(self, item, parent, index):
+        self.node_detach(item)
+        if self.nodes is None:
+            return
+
+        node = self.nodes[item]
+        node.parent = parent
+        children = self.nodes[parent].children
+        if index == tk.END:
+            children.append(item)
+        else:
+            children.insert(max(int(index), 0), item)
+
+        delta = self.nodes[parent].depth + 1 - node.depth
+        if delta:
+            nodes = [item]
+            while nodes:
+                node = self.nodes[nodes.pop()]
+                node.depth += delta
+                nodes.extend(node.children)
+
+    def model_check(self):
+        def check(item):
+            node = self.nodes[item]
+            children = tuple(
+                child for child in self.base.get_children(item) if not child.endswith(PLACEHOLDER))
+            if tuple(node.children) != children:
+                errors.append(f'{item!r}: children {node.children} != {list(children)}')
+
+            for child in children:
+                if child not in self.nodes:
+                    errors.append(f'{child!r}: missing from the model')
+                    continue
+
+                node = self.nodes[child]
+                options = self.base.item(child)
+                if node.parent != item:
+                    errors.append(f'{child!r}: parent {node.parent!r} != {item!r}')
+                if node.depth != self.nodes[item].depth + 1:
+                    errors.append(f'{child!r}: depth {node.depth} != {self.nodes[item].depth + 1}')
+                if node.text != str(options['text']):
+                    errors.append(f'{child!r}: text {node.text!r} != {options["text"]!r}')
+                if list(node.values) != [str(value) for value in options['values'] or ()]:
+                    errors.append(f'{child!r}: values {node.values} != {options["values"]}')
+                if list(node.tags) != [str(tag) for tag in options['tags'] or ()]:
+                    errors.append(f'{child!r}: tags {node.tags} != {options["tags"]}')
+                if node.open != bool(options['open']):
+                    errors.append(f'{child!r}: open {node.open} != {options["open"]}')
+                check(child)
+
+        errors = []
+        if self.nodes is not None and not self.virtual:
+            check('')
+
+        return errors
+
     def tag_add(self, tags, item):
         self.tags_update('add', tags, item)
 
@@ -705,7 +2211,7 @@ class Treeview(ttk.Treeview):
         def set_tag(_item, _tag):
             _tag = 'even' if _tag == 'odd' else 'odd'
             self.tag_add(_tag, _item)
-            self.value_set(self.field.tags, str(self.item(_item, 'tags')), _item)
+            self.stripes[_item] = _tag
             if int(self.item(_item, 'open')):
                 for node in self.get_children(_item):
                     _tag = set_tag(node, _tag)
@@ -720,11 +2226,186 @@ class Treeview(ttk.Treeview):
                 if item in excluded:
                     exclude.append(item)
 
+        self.stripes = {}
         tag = 'odd'
         for item in self.get_children():
             reset(item)
             tag = set_tag(item, tag)
-            self.value_set(self.field.tags, str(self.item(item, 'tags')), item)
+
+    def tags_refresh(self, _=None):
+        top, count = self.rows_viewport()
+        self.rows_build(until=top)
+
+        first = self.rows_index.get(top, 0)
+        self.rows_build(first + count)
+
+        with self.batch('tags_refresh'):
+            for idx in range(first, min(first + count, len(self.rows))):
+                self.stripe(self.rows[idx], 'even' if idx % 2 == 0 else 'odd')
+                self.columns_derive(self.rows[idx])
+
+    def tags_index(self, items, attach=True):
+        nodes = list(items)
+        while nodes:
+            node = nodes.pop()
+            if attach:
+                self.tag_index.set(node, self.item(node, 'tags'))
+            else:
+                self.tag_index.discard(node)
+            nodes.extend(self.get_children(node))
+
+    def tag_clear(self, tag):
+        self.tags_update('remove', tag, None)
+
+    def stripe(self, item, tag):
+        if self.stripes.get(item) == tag:
+            return
+
+        tags = [_tag for _tag in self.item(item, 'tags') if _tag not in ('odd', 'even')]
+        tags.append(tag)
+        self.item(item, tags=tags)
+        self.stripes[item] = tag
+
+    def columns_derive(self, item):
+        values = list(self.item(item, 'values'))
+        derived = {self.field.iid: item, self.field.tags: str(tuple(self.item(item, 'tags')))}
+        if len(values) > self.field.item and values[self.field.item] == 'Node':
+            derived[self.field.open] = str(bool(int(self.item(item, 'open'))))
+
+        changed = False
+        for idx, value in derived.items():
+            if idx < len(values) and str(values[idx]) != value:
+                values[idx] = value
+                changed = True
+
+        if changed:
+            self.item(item, values=values)
+
+    def row_next(self, item):
+        if not item:
+            children = self.get_children()
+            return children[0] if children else ''
+
+        if int(self.item(item, 'open')) and self.get_children(item):
+            return self.get_children(item)[0]
+
+        while item:
+            _next = self.sibling(item, 1)
+            if _next:
+                return _next
+            item = self.parent(item)
+
+        return ''
+
+    def rows_build(self, count=None, until=None):
+        if until is not None and (not until or until in self.rows_index):
+            return
+
+        item = self.rows[-1] if self.rows else ''
+        if self.nodes is not None and not self.rows_walk:
+            self.rows_walk = self.rows_iter(item)
+
+        while count is None or len(self.rows) < count:
+            item = next(self.rows_walk, '') if self.rows_walk else self.row_next(item)
+            if not item:
+                break
+
+            self.rows_index[item] = len(self.rows)
+            self.rows.append(item)
+            if item == until:
+                break
+
+    def rows_iter(self, item):
+        def descend(_item):
+            node = self.nodes[_item]
+            if node.open or not _item:
+                for child in node.children:
+                    if visible is None or child in visible:
+                        yield child
+                        yield from descend(child)
+
+        visible = self.filter_visible
+        yield from descend(item)
+        while item:
+            parent = self.nodes[item].parent
+            if parent is None:
+                return
+
+            siblings = self.nodes[parent].children
+            for sibling in siblings[siblings.index(item) + 1:]:
+                if visible is None or sibling in visible:
+                    yield sibling
+                    yield from descend(sibling)
+            item = parent
+
+    def rows_invalidate(self, item=''):
+        self.rows_walk = None
+        while item and item not in self.rows_index:
+            item = self.parent(item)
+            if not item:
+                return
+
+        idx = self.rows_index.get(item, 0)
+        for row in self.rows[idx:]:
+            del self.rows_index[row]
+        del self.rows[idx:]
+
+    def rows_viewport(self):
+        count = self.viewport_count()
+        if self.virtual:
+            self.rows_build(self.virtual_window + 1)
+            return (self.rows[self.virtual_window] if self.virtual_window < len(self.rows) else ''), count
+
+        rowheight = int(self.rowheight)
+        top = ''
+        for y in range(0, rowheight * 3, max(rowheight // 4, 1)):
+            top = self.base.identify_row(y)
+            if top:
+                break
+
+        return top, count
+
+    def viewport_count(self):
+        return max(self.base.winfo_height() // int(self.rowheight), int(self.base.cget('height'))) + 1
+
+    def view_changed(self, _=None):
+        self.popup_widget_destroy(_)
+        self.refresh()
+
+    def refresh(self, *items, reset=False):
+        self.refresh_sizes.update(items)
+        self.refresh_reset |= reset
+        if self.refresh_action is None:
+            self.refresh_action = self.tcl.action
+        if not self.refresh_pending:
+            self.refresh_pending = self.after_idle(self.refresh_flush)
+
+    def refresh_flush(self):
+        self.refresh_pending = None
+        sizes, self.refresh_sizes = self.refresh_sizes, set()
+        reset, self.refresh_reset = self.refresh_reset, False
+        action, self.refresh_action = self.refresh_action, None
+
+        previous, self.tcl.action = self.tcl.action, action
+        try:
+            self.detached_collect()
+            if self.filter_dirty:
+                self.filter_apply()
+            with self.batch('refresh'):
+                for item in sizes:
+                    if not item or not self.exists(item) or item in self.pending:
+                        continue
+
+                    count = len(self.get_children(item))
+                    word = 'item' if count == 1 else 'items'
+                    self.value_set(self.field.size, f'{count} {word}', item)
+
+                if reset:
+                    self.tags_reset()
+                else:
+                    self.tags_refresh()
+        finally:
+            self.tcl.action = previous
 
     def tag_replace(self, old, new, item=None):
         for item in (item,) if item else self.tag_has(old):
@@ -743,23 +2424,103 @@ class Treeview(ttk.Treeview):
         elif isinstance(tags, str):
             tags = (tags,)
 
-        if not item:
+        if not item and opt == 'remove':
+            items = {node for tag in tags for node in self.tag_has(tag)}
+        elif not item:
             items = []
             for child in self.get_children():
                 get_items(child)
         else:
             items = (item,)
 
-        for item in items:
-            _tags = list(self.item(item, 'tags'))
-            for _tag in tags:
-                if opt == 'add':
-                    if _tag not in _tags:
-                        _tags.append(_tag)
-                elif opt == 'remove':
-                    if _tag in _tags:
-                        _tags.pop(_tags.index(_tag))
-            self.item(item, tags=_tags)
+        with self.batch('tags_update'):
+            for item in items:
+                _tags = list(self.item(item, 'tags'))
+                for _tag in tags:
+                    if opt == 'add':
+                        if _tag not in _tags:
+                            _tags.append(_tag)
+                    elif opt == 'remove':
+                        if _tag in _tags:
+                            _tags.pop(_tags.index(_tag))
+                self.item(item, tags=_tags)
+
+    def sort_column(self, column):
+        if self.sort_order and self.sort_order[0] == column:
+            self.sorted_columns[column] = not self.sorted_columns[column]
+        else:
+            if column in self.sort_order:
+                self.sort_order.remove(column)
+            self.sort_order.insert(0, column)
+
+        for idx, cfg in enumerate(self.headings):
+            text = cfg['text']
+            if f'#{idx}' == column:
+                text += ' \u25b2' if self.sorted_columns[column] else ' \u25bc'
+            self.base.heading(f'#{idx}', text=text)
+
+        self.sort(self.sort_order)
+
+    def sort(self, columns, parents=None):
+        keys = [self.sort_key(column) for column in columns]
+        ascending = [self.sorted_columns.get(column, True) for column in columns]
+
+        if parents is None:
+            if self.nodes is not None:
+                parents = [item for item, node in self.nodes.items() if len(node.children) > 1]
+            else:
+                parents = ['']
+                for parent in parents:
+                    parents.extend(self.get_children(parent))
+
+        with self.batch('sort'):
+            for parent in parents:
+                children = self.get_children(parent)
+                if len(children) < 2:
+                    continue
+
+                rows = [(tuple(key(item) for key in keys), item) for item in children]
+                for idx in reversed(range(len(keys))):
+                    rows.sort(key=lambda row: row[0][idx], reverse=not ascending[idx])
+                self.reorder(parent, [item for _, item in rows])
+
+        self.virtual_schedule()
+        self.refresh()
+
+    def sort_key(self, column):
+        def key(item):
+            values = self.item(item, 'values')
+            return convert(values[idx] if idx < len(values) else '')
+
+        if column == '#0':
+            return lambda item: self.sort_text(self.item(item, 'text'))
+
+        idx = int(column.lstrip('#')) - 1
+        convert = {
+            getattr(self.field, 'size', None): self.sort_size,
+            getattr(self.field, 'last_modified', None): self.sort_date,
+        }.get(idx, self.sort_text)
+
+        return key
+
+    @staticmethod
+    def sort_text(text):
+        return str(text).casefold()
+
+    @staticmethod
+    def sort_size(text):
+        match = re.match(r'\s*(\d+(?:\.\d+)?)\s*(\w*)', str(text))
+        if not match:
+            return 2, 0
+
+        number, unit = float(match.group(1)), match.group(2).lower()
+        if unit in SIZE_UNITS:
+            return 1, number * SIZE_UNITS[unit]
+        return 0, number
+
+    @staticmethod
+    def sort_date(text):
+        return tuple(int(part) for part in re.findall(r'\d+', str(text)))
 
     def value_get(self, idx, item):
         idx = int(idx)
@@ -822,17 +2583,17 @@ class Treeview(ttk.Treeview):
             x = self.active_popup_widget.winfo_rootx()
             y = self.active_popup_widget.winfo_rooty()
         else:
-            bbox = self.bbox(item)
+            bbox = self.base.bbox(item)
             x, y, _, _ = bbox
             x += root.winfo_rootx()
             y += root.winfo_rooty()
 
         widest_cell = 0
         font = self.default_font
-        char_width = font.measure('W')
+        char_width = self.text_widths.measure(font, 'W')
 
         for node in self.get_children(item):
-            size = font.measure(self.item(node, 'text'))
+            size = self.text_widths.measure(font, self.item(node, 'text'))
             if size > widest_cell:
                 widest_cell = size + char_width
 
@@ -859,131 +2620,326 @@ class Treeview(ttk.Treeview):
             else:
                 set_selections(item)
 
-        self.undo_data = {}
-        for node in selections:
-            self.undo_data[node] = (self.parent(node), self.index(node))
-
         self.detach(*selections)
         self.detached = selections
 
         prev = self.prev(selections[0])
         self.focus(prev)
         self.selection_add(prev)
-        self.tags_reset(excluded='selected')
+        self.refresh()
 
     def undo(self, _=None):
-        for item, (parent, idx) in self.undo_data.items():
-            self.reattach(item, parent, idx)
-            self.selection_remove(item)
+        self.paste_cancel()
+        self.history_apply(self.history.undo())
 
-        self.undo_data = {}
-        self.tags_reset()
+    def redo(self, _=None):
+        self.paste_cancel()
+        self.history_apply(self.history.redo())
+
+    def history_apply(self, entries):
+        if not entries:
+            return
+
+        self.history.paused = True
+        try:
+            with self.batch():
+                for idx, entry in enumerate(entries):
+                    if entry['op'] == 'delete':
+                        items = set(entry['items'])
+                        entries[idx] = dict(entry, items=[
+                            item for item in items if self.exists(item) and self.parent(item) not in items])
+                self.journal_replay(entries)
+        finally:
+            self.history.paused = False
+
+        self.detached = [item for item in self.detached or () if not self.attached(item)]
+        self.selection_remove(*(item for item in self.selection() if not self.exists(item)))
+        self.tag_clear('selected')
+        self.refresh()
 
     def copy(self, _=None):
         def set_selected(_item):
+            self.lazy_load(_item)
             self.selected.append(_item)
             self.tag_add('selected', _item)
-            self.value_set(self.field.tags, str(self.item(_item, 'tags')), _item)
             if not self.item(_item, 'open'):
                 for node in self.get_children(_item):
                     set_selected(node)
 
-        if not self.shift:
-            for item in self.tag_has('selected'):
-                self.tag_remove('selected', item)
-                self.value_set(self.field.tags, str(self.item(item, 'tags')), item)
+        with self.batch('copy'):
+            if not self.shift:
+                self.tag_clear('selected')
+
+            self.selected = []
+            for item in self.selection():
+                set_selected(item)
+
+            self.clipboard = self.clipboard_capture(self.selected)
+            self.clipboard_clear()
+            if self.clipboard:
+                self.clipboard_append(self.clipboard.dumps())
+
+        self.refresh()
+
+    def clipboard_capture(self, items):
+        captured = set(items)
+        children = {}
+        roots = []
+        for item in reversed(items):
+            data = self.item(item)
+            tags = tuple(tag for tag in data['tags'] if tag != 'selected')
+            values = list(data['values'])
+            if len(values) > self.field.tags:
+                values[self.field.tags] = str(tags)
+
+            node = Clipboard.Item(data['text'], data['image'], tuple(values), data['open'], tags,
+                                  tuple(reversed(children.pop(item, ()))))
+            parent = self.parent(item)
+            if parent in captured:
+                children.setdefault(parent, []).append(node)
+            else:
+                roots.append(node)
 
-        self.selected = []
-        for item in self.selection():
-            set_selected(item)
+        return Clipboard(reversed(roots))
 
-    def paste(self, _=None):
-        selections = self.detached if self.detached else self.selected
+    def clipboard_read(self):
+        try:
+            text = self.clipboard_get()
+        except tk.TclError:
+            text = None
 
-        if not self.selected and not self.detached:
-            selections = self.tag_has('selected')
+        if text and text != self.clipboard.text:
+            clipboard = Clipboard.loads(text)
+            if clipboard:
+                self.clipboard = clipboard
 
-        for dst_item in self.selection():
-            if not len(selections) or self.value_get(self.field.item, dst_item) != 'Node':
-                continue
+        if not self.clipboard and self.tag_has('selected'):
+            self.clipboard = self.clipboard_capture(self.tag_has('selected'))
 
-            if self.detached:
-                for item in selections:
-                    self.reattach(item, dst_item, tk.END)
-                self.detached = False
-            else:
-                selected = {}
-                for item in selections:
-                    parent = self.parent(item)
-                    dst = selected[parent] if parent in selected else dst_item
-                    self.value_set(self.field.last_modified, datetime.now().strftime("%Y/%m/%d %H:%M:%S"), item)
-
-                    iid = self.insert(dst, **self.item(item))
-                    if iid == SKIP:
+        return self.clipboard
+
+    def paste(self, _=None):
+        jobs = []
+        total = 0
+        self.paste_cancel()
+        self.history.begin()
+        try:
+            with self.batch('paste'):
+                selections = self.detached if self.detached else self.clipboard_read().items
+
+                for dst_item in self.selection():
+                    if not len(selections) or self.value_get(self.field.item, dst_item) != 'Node':
+                        continue
+
+                    if self.detached:
+                        for item in selections:
+                            self.reattach(item, dst_item, tk.END)
+                        self.detached = False
+                    else:
+                        jobs.extend((dst_item, item) for item in selections)
+                        total += len(self.clipboard)
+
+                    self.refresh()
+                    self.selection_remove(self.tag_has('selected'))
+                    self.selection_set(self.focus())
+
+            if jobs:
+                self.paste_start(jobs, total)
+        finally:
+            self.history.end()
+
+    def paste_start(self, jobs, total):
+        def resolve(parent, text):
+            names = self.names_get(parent)
+            taken = staged.get(parent, ())
+            if not unique or text not in names and text not in taken:
+                return text
+
+            if policy[0] == 'ask':
+                flush()
+                text = self.name_resolve(parent, text)
+                if text != CANCEL:
+                    policy[0] = 'skip' if text == SKIP else 'suffix'
+                return text
+
+            if policy[0] == 'skip':
+                return SKIP
+
+            count = 2
+            while f'{text} ({count})' in names or f'{text} ({count})' in taken:
+                count += 1
+            return f'{text} ({count})'
+
+        def flush():
+            for target, items in batch.items():
+                self.populate(target, items)
+                for data in items:
+                    iid = data.pop('iid')
+                    if self.journal is not None:
+                        data['values'] = self.item(iid, 'values')
+                        self.journal.record('insert', parent=target, index=tk.END, iid=iid, item=data)
+                    self.history.record(
+                        {'op': 'insert', 'parent': target, 'index': tk.END, 'iid': iid, 'item': data},
+                        [{'op': 'delete', 'items': [iid]}])
+            batch.clear()
+            staged.clear()
+            created.clear()
+
+        def step():
+            try:
+                deadline = perf_counter() + PASTE_SLICE
+                while jobs and perf_counter() < deadline:
+                    target, item = jobs.pop()
+                    done[0] += 1
+                    if target in created:
+                        flush()
+                    if not self.exists(target):
                         continue
-                    elif iid == CANCEL:
+
+                    data = Clipboard.data(item)
+                    text = resolve(target, data['text'])
+                    if text == CANCEL:
+                        jobs.clear()
                         break
-                    elif iid:
-                        self.value_set(self.field.iid, iid, iid)
-                        self.tag_remove('selected', iid)
-                        selected[item] = iid
+                    elif text == SKIP:
+                        continue
 
-            self.tags_reset(excluded='selected')
-            self.selection_remove(self.tag_has('selected'))
-            self.selection_set(self.focus())
+                    if len(data['values']) > self.field.last_modified:
+                        data['values'][self.field.last_modified] = stamp
+                    data.update(text=text, iid=self.iid_new())
+                    batch.setdefault(target, []).append(data)
+                    staged.setdefault(target, set()).add(text)
+                    created.add(data['iid'])
+                    jobs.extend((data['iid'], child) for child in reversed(item.children))
+                flush()
+            except Exception:
+                jobs.clear()
+                raise
+            finally:
+                progress.configure(value=done[0])
+                if jobs:
+                    self.pasting = self.after(1, step)
+                else:
+                    finish()
+
+        def finish():
+            self.pasting = self.paste_finish = None
+            progress.destroy()
+            self.history.end()
+            self.refresh()
+
+        self.paste_cancel()
+        jobs.reverse()
+        done = [0]
+        batch = {}
+        staged = {}
+        created = set()
+        policy = [self.collisions]
+        unique = self.columns[0].get('unique', False)
+        stamp = datetime.now().strftime("%Y/%m/%d %H:%M:%S")
+
+        progress = ttk.Progressbar(self.frame, maximum=total)
+        progress.grid(row=LAST_ROW + 1, column=0, columnspan=LAST_COLUMN + 1, sticky=tk.EW)
+        self.paste_finish = finish
+        self.history.begin()
+        self.pasting = self.after_idle(step)
+
+    def paste_cancel(self):
+        if self.pasting:
+            self.after_cancel(self.pasting)
+            self.paste_finish()
 
     def delete(self, *items):
         items = list(items)
-        for item in items:
-            parent = self.parent(item)
-            if parent:
-                value = int(self.value_get(self.field.size, parent).split(' ')[0]) - 1
-                word = 'item' if value == 1 else 'items'
-                self.value_set(self.field.size, f'{value} {word}', parent)
+        self.refresh(*(self.parent(item) for item in items if item))
 
         if '' in items:
             items.pop(items.index(''))
+        if items and not self.history.paused:
+            self.delete_record(items)
+        for item in items:
+            self.rows_invalidate(self.prev(item))
+            self.names_discard(item)
+            self.names.pop(item, None)
+        if items and self.journal is not None:
+            self.journal.record('delete', items=items)
         if items:
-            super(Treeview, self).delete(*items)
+            self.index_discard(items)
+        if items:
+            if self.virtual:
+                self.virtual_remove(items)
+            else:
+                self.base.delete(*items)
+            for item in items:
+                self.node_delete(item)
+            self.depths.clear()
+            self.virtual_schedule()
+
+    def delete_record(self, items):
+        deleted = set(items)
+        places = []
+        for item in items:
+            parent = self.parent(item)
+            while parent and parent not in deleted:
+                parent = self.parent(parent)
+            if not parent and self.exists(item):
+                places.append((self.index(item), self.parent(item), item))
+
+        inverse = []
+        count = 0
+        for index, parent, item in sorted(places):
+            data = self.serialize_subtree(item)
+            inverse.append({'op': 'insert', 'parent': parent, 'index': index, 'iid': item, 'item': data})
+            stack = [data]
+            while stack:
+                count += 1
+                stack.extend(stack.pop().get('children', ()))
+
+        self.history.record({'op': 'delete', 'items': list(items)}, inverse, count)
 
     def insert(self, parent, index=tk.END, **kwargs):
         kwargs.pop('children', None)
+        kwargs.pop('lazy', None)
 
-        for idx, column in enumerate(self.columns):
-            if 'unique' in column and column['unique'] and not idx:
-                text = kwargs['text']
-                children = self.get_children(parent)
-
-                column_values = []
-                for node in children:
-                    column_values.append(self.item(node, 'text'))
+        if self.columns[0].get('unique', False):
+            text = self.name_resolve(parent, kwargs['text'])
+            if text in (SKIP, CANCEL):
+                return text
 
-                for node in children:
-                    while text == self.item(node, 'text'):
-                        result = self.dlg_rename(
-                            'Rename',
-                            f'The name "{text}" already exists, please choose another name and try again.',
-                            text,
-                        )
-                        if result in (SKIP, CANCEL):
-                            return result
+            kwargs['text'] = text
 
-                        text = result
+        iid = kwargs.pop('iid', None)
+        if iid is None or self.exists(iid):
+            iid = self.iid_new()
+        if self.journal is not None:
+            self.journal.record('insert', parent=parent, index=index, iid=iid, item=kwargs)
+        self.history.record({'op': 'insert', 'parent': parent, 'index': index, 'iid': iid, 'item': dict(kwargs)},
+                            [{'op': 'delete', 'items': [iid]}])
 
-                kwargs['text'] = text
-
-        iid = super(Treeview, self).insert(parent, index, **kwargs)
-
-        child_count = len(self.get_children(parent))
-        if child_count:
-            word = 'item' if child_count == 1 else 'items'
-            self.value_set(self.field.size, f'{len(self.get_children(parent))} {word}', parent)
+        if self.virtual:
+            self.virtual_schedule()
+        else:
+            self.base.insert(parent, index, iid=iid, **kwargs)
+        self.node_insert(parent, index, iid, **kwargs)
+        self.names.pop(iid, None)
+        self.pending.pop(iid, None)
+        self.names_add(iid)
+        self.tag_index.set(iid, kwargs.get('tags', ()))
+        if self.search_index is not None:
+            self.search_index.add(iid, self.search_texts(iid, kwargs))
+        if self.fit:
+            self.fit_bump(iid)
+
+        self.refresh(parent)
+        self.rows_invalidate(self.prev(iid))
         self.see(iid)
 
         return iid
 
     def escape(self, _):
-        self.tags_reset()
+        self.paste_cancel()
+        self.tag_clear('selected')
+        self.refresh()
         self.selection_remove(*self.selection())
         self.selection_set(self.focus())
 
@@ -992,17 +2948,19 @@ class Treeview(ttk.Treeview):
             self.selection_add(_child)
             for node in self.get_children(_child):
                 select(node)
-        for child in self.get_children():
-            select(child)
+
+        with self.batch('control_a'):
+            for child in self.get_children():
+                select(child)
 
     def shift_up(self, _):
         rowheight = self.style.lookup('Treeview', 'rowheight')
 
         focus = self.focus()
-        x, y, _, _ = self.bbox(focus)
+        x, y, _, _ = self.base.bbox(focus)
         x += self.winfo_rootx()
 
-        _prev = self.identify('item', x, y-rowheight+1)
+        _prev = self.base.identify('item', x, y-rowheight+1)
         if _prev:
             self.see(_prev)
             self.focus(_prev)
@@ -1018,10 +2976,10 @@ class Treeview(ttk.Treeview):
     def shift_down(self, _):
         rowheight = self.style.lookup('Treeview', 'rowheight')
         focus = self.focus()
-        x, y, _, _ = self.bbox(focus)
+        x, y, _, _ = self.base.bbox(focus)
         x += self.winfo_rootx()
 
-        _next = self.identify('item', x, y+rowheight+1)
+        _next = self.base.identify('item', x, y+rowheight+1)
         if _next:
             self.see(_next)
             self.focus(_next)
@@ -1044,129 +3002,375 @@ class Treeview(ttk.Treeview):
             self.shift = False
 
     def expand_tree(self, _):
-        def func():
-            item = self.identify('item', self.winfo_pointerx(), self.winfo_pointery()-self.winfo_rooty())
-            self.value_set(self.field.open, True, item)
-            self.tags_reset(excluded='selected')
-        self.after(1, func)
+        item = self.focus()
+        self.lazy_load(item)
+        self.item(item, open=True)
+        self.rows_invalidate(item)
+        self.refresh()
+        self.virtual_flush()
 
     def collapse_tree(self, _=None):
-        def func():
-            item = self.identify('item', self.winfo_pointerx(), self.winfo_pointery()-self.winfo_rooty())
-            self.value_set(self.field.open, False, item)
-            self.tags_reset(excluded='selected')
-        self.after(1, func)
+        item = self.focus()
+        self.item(item, open=False)
+        self.rows_invalidate(item)
+        self.refresh()
+        self.virtual_flush()
 
     def column_expand(self, event):
-        def get_largest_string(_children):
-            _largest = 0
-            idx = int(column.lstrip('#'))-1
-
-            for child in _children:
-                if column == '#0':
-                    _text = self.item(child, 'text')
-                elif len(self.item(child, 'values')) > 1:
-                    _text = self.item(child, 'values')[idx]
-                else:
-                    continue
+        if self.base.identify('region', event.x, event.y) != 'separator':
+            return
 
-                _length = font.measure(_text) + (indent * self.item_depth(child)) if column == '#0' \
-                    else font.measure(_text)
+        column = self.base.identify('column', event.x, event.y)
+        self.base.column(column, width=self.column_fit(column) + self.text_widths.measure(self.text_font, 'W'))
 
-                if _length > _largest:
-                    _largest = _length
+    def column_fit(self, column):
+        if self.fit_mode == 'viewport':
+            top, count = self.rows_viewport()
+            self.rows_build(until=top)
+            idx = self.rows_index.get(top, 0)
+            self.rows_build(idx + count)
+            rows = self.rows[idx:idx + count]
+        else:
+            self.rows_build()
+            rows = self.rows
 
-                _children = self.get_children(child)
-                if not _children or not int(self.item(child, 'open')):
-                    continue
+        if self.fit_mode is None:
+            width, holder = self.fit.get(column, (0, ''))
+            if holder in self.rows_index and self.cell_width(holder, column) == width:
+                return width
+        elif isinstance(self.fit_mode, int) and len(rows) > self.fit_mode > 0:
+            rows = rows[::len(rows) // self.fit_mode]
 
-                _length = get_largest_string(_children)
-                if _length > _largest:
-                    _largest = _length
+        width, holder = max(((self.cell_width(item, column), item) for item in rows), default=(0, ''))
+        if self.fit_mode is None:
+            self.fit[column] = (width, holder)
 
-            return _largest
+        return width
 
-        region = self.identify('region', event.x, event.y)
+    def cell_width(self, item, column, text=None):
+        if text is None:
+            if column == '#0':
+                text = self.item(item, 'text')
+            else:
+                values = self.item(item, 'values')
+                idx = int(column.lstrip('#')) - 1
+                text = values[idx] if idx < len(values) else ''
 
-        if region != 'separator':
-            return
+        if column != '#0':
+            return self.text_widths.measure(self.text_font, text)
 
-        largest = 0
-        column = self.identify('column', event.x, event.y)
-        font = tkfont.nametofont('TkTextFont')
-        font_width = font.measure('W')
-        row_height = font.metrics('linespace')
-        indent = row_height + font_width
+        if self.fit_indent is None:
+            self.fit_indent = self.text_font.metrics('linespace') + self.text_widths.measure(self.text_font, 'W')
 
-        for item in self.get_children():
-            text = self.item(item, 'text') if column == '#0' else self.item(item, 'values')[0]
-            length = font.measure(text)+indent
-            largest = length if length > largest else largest
+        return self.text_widths.measure(self.text_font, text) + self.fit_indent * self.item_depth(item)
 
-            children = self.get_children(item)
-            if not children or not int(self.item(item, 'open')):
-                continue
+    def fit_visible(self, item):
+        parent = self.parent(item)
+        while parent:
+            if not int(self.item(parent, 'open')):
+                return False
+            item, parent = parent, self.parent(parent)
+
+        return self.attached(item)
+
+    def fit_bump(self, item):
+        if not self.fit_visible(item):
+            return
 
-            length = get_largest_string(children)
-            if length > largest:
-                largest = length
+        for column, (width, holder) in list(self.fit.items()):
+            length = self.cell_width(item, column)
+            if length > width:
+                self.fit[column] = (length, item)
+
+    def fit_update(self, item, kw):
+        if kw.get('open') and not int(self.item(item, 'open')) and self.fit_visible(item):
+            children = list(self.get_children(item))
+            while children:
+                child = children.pop()
+                for column, (width, holder) in list(self.fit.items()):
+                    length = self.cell_width(child, column)
+                    if length > width:
+                        self.fit[column] = (length, child)
+                if int(self.item(child, 'open')):
+                    children.extend(self.get_children(child))
+
+        for column, (width, holder) in list(self.fit.items()):
+            if column == '#0':
+                text = kw.get('text')
+            else:
+                idx = int(column.lstrip('#')) - 1
+                text = kw['values'][idx] if 'values' in kw and idx < len(kw['values']) else None
+            if text is None:
+                continue
 
-        self.column(column, width=largest+font_width)
+            length = self.cell_width(item, column, text)
+            if length >= width and self.fit_visible(item):
+                self.fit[column] = (length, item)
+            elif holder == item:
+                del self.fit[column]
 
     def detach(self, *items):
         if not items:
             items = self.selection()
 
-        self.undo_data = {}
         for item in items:
-            self.undo_data[item] = (self.parent(item), self.index(item))
-
-            parent = self.parent(item)
-            if parent:
-                value = int(self.value_get(self.field.size, parent).split(' ')[0]) - 1
-                word = 'item' if value == 1 else 'items'
-                self.value_set(self.field.size, f'{value} {word}', parent)
+            self.refresh(self.parent(item))
 
         item = self.prev(self.focus())
 
-        super(Treeview, self).detach(*self.selection())
+        selections = self.selection()
+        if self.journal is not None:
+            self.journal.record('detach', items=selections)
+        places = sorted((self.index(node), self.parent(node), node) for node in selections)
+        self.history.record({'op': 'detach', 'items': list(selections)},
+                            [{'op': 'move', 'iid': node, 'parent': parent, 'index': index}
+                             for index, parent, node in places], self.subtree_count(selections))
+        for node in selections:
+            self.rows_invalidate(self.prev(node))
+            self.names_discard(node)
+        self.tags_index(selections, attach=False)
+        self.detached_roots.update(selections)
+        if self.virtual:
+            self.virtual_remove(selections)
+            self.virtual_schedule()
+        else:
+            self.base.detach(*selections)
+        for node in selections:
+            self.node_detach(node)
+        self.depths.clear()
 
         self.focus(item)
         self.selection_add(item)
-        self.tags_reset(excluded='selected')
+        self.refresh()
 
     def reattach(self, item, parent, index):
-        for idx, column in enumerate(self.columns):
-            if 'unique' in column and column['unique'] and not idx:
-                text = self.item(item, 'text')
-                children = self.get_children(parent)
+        if self.columns[0].get('unique', False) and not (self.attached(item) and self.parent(item) == parent):
+            text = self.name_resolve(parent, self.item(item, 'text'))
+            if text in (SKIP, CANCEL):
+                return text
+
+            self.rename(item, text)
+
+        self.depths.clear()
+        return self.move(item, parent, index)
+
+    def move(self, item, parent, index):
+        if self.journal is not None:
+            self.journal.record('move', iid=item, parent=parent, index=index)
+        if not self.history.paused:
+            if self.attached(item):
+                inverse = {'op': 'move', 'iid': item, 'parent': self.parent(item), 'index': self.index(item)}
+            else:
+                inverse = {'op': 'detach', 'items': [item]}
+            self.history.record({'op': 'move', 'iid': item, 'parent': parent, 'index': index}, [inverse])
+        self.refresh(self.parent(item), parent)
+        self.names_discard(item)
+        hidden = not self.reachable(item)
+        if item in self.rows_index:
+            self.rows_invalidate(self.prev(item))
+        if self.virtual:
+            self.virtual_remove((item,))
+            self.virtual_schedule()
+        else:
+            self.base.move(item, parent, index)
+        self.node_move(item, parent, index)
+        self.names_add(item)
+        if hidden == self.reachable(item):
+            self.tags_index((item,), attach=hidden)
+        self.rows_invalidate(self.prev(item))
+        self.depths.clear()
+        self.fit.clear()
+
+    def reorder(self, parent, children):
+        current = self.get_children(parent)
+        children = list(children)
+        if tuple(children) == tuple(current):
+            return
 
-                column_values = []
-                for node in children:
-                    column_values.append(self.item(node, 'text'))
+        moves = self.reorder_moves(current, children)
+        if self.journal is not None:
+            self.journal.record('order', parent=parent, children=children)
+        self.history.record({'op': 'order', 'parent': parent, 'children': children},
+                            [{'op': 'order', 'parent': parent, 'children': list(current)}], len(moves))
+
+        if self.virtual:
+            self.virtual_schedule()
+        elif parent in self.filter_shown:
+            self.filter_dirty = True
+        elif moves:
+            data = []
+            for item, index in moves:
+                data.extend((item, index))
+            self.tcl.call('foreach', ('iid', 'index'), tuple(data), f'{self._w} move $iid {{{parent}}} $index')
+        if self.nodes is not None:
+            self.nodes[parent].children = children
+        self.rows_invalidate(parent)
+
+    @staticmethod
+    def reorder_moves(current, order):
+        def add(idx, delta):
+            idx += 1
+            while idx <= size:
+                counts[idx] += delta
+                idx += idx & -idx
+
+        def before(idx):
+            total = 0
+            while idx > 0:
+                total += counts[idx]
+                idx -= idx & -idx
+            return total
+
+        position = {item: idx for idx, item in enumerate(current)}
+        sequence = [position[item] for item in order]
+        size = len(sequence)
+
+        tails = []
+        values = []
+        links = [-1] * size
+        for idx, value in enumerate(sequence):
+            pos = bisect_left(values, value)
+            if pos:
+                links[idx] = tails[pos - 1]
+            if pos == len(tails):
+                tails.append(idx)
+                values.append(value)
+            else:
+                tails[pos] = idx
+                values[pos] = value
+
+        keep = set()
+        idx = tails[-1] if tails else -1
+        while idx >= 0:
+            keep.add(idx)
+            idx = links[idx]
+
+        counts = [0] * (size + 1)
+        for idx, value in enumerate(sequence):
+            if idx not in keep:
+                add(value, 1)
+
+        moves = []
+        anchor = 0
+        for idx, value in enumerate(sequence):
+            if idx in keep:
+                anchor = value
+                continue
+            add(value, -1)
+            moves.append((order[idx], idx + before(anchor)))
+        return moves
+
+    def attached(self, item):
+        if self.nodes is not None:
+            return self.node(item).parent is not None
+
+        return bool(self.parent(item)) or item in self.get_children()
+
+    def reachable(self, item):
+        while item:
+            if not self.attached(item):
+                return False
+            item = self.parent(item)
+
+        return True
+
+    def detached_collect(self):
+        held = set(self.detached or ())
+        items = []
+        for item in list(self.detached_roots):
+            if not self.exists(item) or self.attached(item):
+                self.detached_roots.discard(item)
+            elif item not in held and item not in self.history.refs:
+                self.detached_roots.discard(item)
+                items.append(item)
+
+        if not items:
+            return
 
-                for node in children:
-                    while text == self.item(node, 'text'):
-                        result = self.dlg_rename(
-                            'Rename',
-                            f'The name "{text}" already exists, please choose another '
-                            f'name and try again.',
-                            text,
-                        )
-                        if result in (SKIP, CANCEL):
-                            return result
+        if self.journal is not None:
+            self.journal.record('delete', items=items)
+        nodes = list(items)
+        while nodes:
+            node = nodes.pop()
+            self.names.pop(node, None)
+            self.lazy_discard(node)
+            self.stripes.pop(node, None)
+            self.virtual_selection.discard(node)
+            self.tag_index.discard(node)
+            if self.search_index is not None:
+                self.search_index.discard(node)
+            nodes.extend(self.get_children(node))
+        if not self.virtual:
+            self.base.delete(*items)
+        for item in items:
+            self.node_delete(item)
+        self.depths.clear()
 
-                        text = result
-                        self.item(item, text=text)
+    def detached_count(self):
+        return self.subtree_count(item for item in self.detached_roots if self.exists(item))
 
-        iid = self.move(item, parent, index)
+    def subtree_count(self, items):
+        count = 0
+        nodes = list(items)
+        while nodes:
+            count += 1
+            nodes.extend(self.get_children(nodes.pop()))
 
-        return iid
+        return count
+
+    def rename(self, item, text):
+        self.names_discard(item)
+        self.item(item, text=text)
+        self.names_add(item)
+
+    def names_get(self, parent):
+        if parent in self.pending:
+            self.lazy_load(parent)
+
+        if parent not in self.names:
+            self.names[parent] = {self.item(node, 'text') for node in self.get_children(parent)}
+
+        return self.names[parent]
+
+    def names_add(self, item):
+        parent = self.parent(item)
+        if parent in self.names and (parent or self.attached(item)):
+            self.names[parent].add(self.item(item, 'text'))
+
+    def names_discard(self, item):
+        parent = self.parent(item)
+        if parent in self.names and (parent or self.attached(item)):
+            self.names[parent].discard(self.item(item, 'text'))
+
+    def name_exists(self, parent, text):
+        return text in self.names_get(parent)
+
+    def name_resolve(self, parent, text):
+        names = self.names_get(parent)
+        while text in names:
+            result = self.dlg_rename(
+                'Rename',
+                f'The name "{text}" already exists, please choose another name and try again.',
+                text,
+            )
+            if result == '':
+                continue
+
+            if result in (SKIP, CANCEL):
+                return result
+
+            text = result
+
+        return text
 
     def wheel_mouse(self, event):
         if not self.item(self.focus(), 'text'):
             self.delete(self.focus())
 
+        if self.virtual:
+            self.yview_scroll(-3 if event.num == WHEEL_MOUSE_DOWN else 3, tk.UNITS)
+            return 'break'
+
         value = -0.1/3 if event.num == WHEEL_MOUSE_DOWN else 0.1/3
         self.yview('moveto', self.yview()[0] + value)
 
@@ -1177,10 +3381,10 @@ class Treeview(ttk.Treeview):
             if not self.focus_get().var.get().strip(' '):
                 self.focus_get().destroy()
                 self.delete(self.focus())
-                self.tags_reset()
+                self.refresh()
                 return
             else:
-                self.item(self.focus(), text=self.focus_get().var.get())
+                self.rename(self.focus(), self.focus_get().var.get())
                 self.focus_get().destroy()
                 return
 
@@ -1197,36 +3401,33 @@ class Treeview(ttk.Treeview):
 
             if item_text == wdg_text and not item_text:
                 self.delete(item)
-                self.tags_reset()
+                self.refresh()
                 return
 
             if not item_text and not wdg_text:
                 self.delete(item)
-                self.tags_reset()
+                self.refresh()
                 return
 
             if not item_text:
                 if unique:
-                    for node in self.get_children(self.parent(item)):
-                        if wdg_text == self.item(node, 'text'):
-                            self.delete(item)
-                            self.tags_reset()
-                            return
+                    if self.name_exists(self.parent(item), wdg_text):
+                        self.delete(item)
+                        self.refresh()
+                        return
                 else:
                     return
 
-            if unique:
-                for node in self.get_children(self.parent(item)):
-                    if wdg_text == self.item(node, 'text'):
-                        return
+            if unique and self.name_exists(self.parent(item), wdg_text):
+                return
 
             if not column and wdg_text:
-                self.item(self.focus(), text=wdg_text)
+                self.rename(self.focus(), wdg_text)
             else:
                 self.value_set(column - 1, wdg_text, self.focus())
 
             self.active_popup_widget = None
-            self.tags_reset()
+            self.refresh()
 
     def button_click(self, _):
         item = self.focus()
@@ -1236,7 +3437,7 @@ class Treeview(ttk.Treeview):
             if not wdg.var.get().strip(' '):
                 wdg.destroy()
                 self.delete(self.focus())
-                self.tags_reset()
+                self.refresh()
                 return
 
         if self.active_popup_widget:
@@ -1251,46 +3452,43 @@ class Treeview(ttk.Treeview):
 
             if item_text == wdg_text and not item_text:
                 self.delete(item)
-                self.tags_reset()
+                self.refresh()
                 return
 
             if not item_text and not wdg_text:
                 self.delete(item)
-                self.tags_reset()
+                self.refresh()
                 return
 
             if not item_text:
                 if unique:
-                    for node in self.get_children(self.parent(item)):
-                        if wdg_text == self.item(node, 'text'):
-                            self.delete(item)
-                            self.tags_reset()
-                            return
+                    if self.name_exists(self.parent(item), wdg_text):
+                        self.delete(item)
+                        self.refresh()
+                        return
                 else:
                     return
 
-            if unique:
-                for node in self.get_children(self.parent(item)):
-                    if wdg_text == self.item(node, 'text'):
-                        return
+            if unique and self.name_exists(self.parent(item), wdg_text):
+                return
 
             if not column and wdg_text:
-                self.item(item, text=wdg_text)
+                self.rename(item, wdg_text)
             else:
                 self.value_set(column - 1, wdg_text, self.focus())
 
             self.active_popup_widget = None
-            self.tags_reset()
+            self.refresh()
 
     def button_release(self, event):
-        self.focus(self.identify('item', event.x, event.y))
+        self.focus(self.base.identify('item', event.x, event.y))
 
     def button_double_click(self, event):
-        region = self.identify_region(event.x, event.y)
+        region = self.base.identify_region(event.x, event.y)
 
         if region == 'tree' or region == 'cell':
-            row = self.identify_row(event.y)
-            column = self.identify_column(event.x)
+            row = self.base.identify_row(event.y)
+            column = self.base.identify_column(event.x)
 
             self.active_popup_column = None
             wdg = self.active_popup_widget = self.popup_widget(row, column)
@@ -1303,7 +3501,7 @@ class Treeview(ttk.Treeview):
         elif region == 'separator':
             self.column_expand(event)
         elif region == 'heading':
-            self.after(1, self.tags_reset)
+            self.refresh(reset=True)
 
         return 'break'
 
@@ -1328,16 +3526,24 @@ class Treeview(ttk.Treeview):
         return 'break'
 
     def item_depth(self, item):
-        depth = 1
-        parent = self.parent(item)
-        while parent:
+        if self.nodes is not None:
+            return self.node(item).depth
+
+        items = []
+        while item and item not in self.depths:
+            items.append(item)
+            item = self.parent(item)
+
+        depth = self.depths.get(item, 0)
+        for item in reversed(items):
             depth += 1
-            parent = self.parent(parent)
+            self.depths[item] = depth
 
         return depth
 
     def insert_leaf(self, _=None):
-        item = self.focus() if isinstance(_, tk.Event) else self.identify(
+        self.filter_clear()
+        item = self.focus() if isinstance(_, tk.Event) else self.base.identify(
             'item', self.popup.x, self.popup.y-self.winfo_rooty())
 
         if not item:
@@ -1358,12 +3564,12 @@ class Treeview(ttk.Treeview):
         )
 
         self.focus(iid)
-        self.tags_reset()
-        self.value_set(self.field.iid, iid, iid)
+        self.refresh()
         self.popup_widget(iid, '#0')
 
     def insert_node(self, _=None):
-        item = self.focus() if isinstance(_, tk.Event) else self.identify(
+        self.filter_clear()
+        item = self.focus() if isinstance(_, tk.Event) else self.base.identify(
             'item', self.popup.x, self.popup.y-self.winfo_rooty())
 
         if not item:
@@ -1385,47 +3591,484 @@ class Treeview(ttk.Treeview):
         )
 
         self.focus(iid)
-        self.value_set(self.field.iid, iid, iid)
-        self.tags_reset()
+        self.refresh()
         self.popup_widget(iid, '#0')
 
-    def populate(self, parent, data=()):
+    def populate(self, parent, data=(), bulk=True):
+        def insert(_parent, _data, names):
+            count = 0
+            for item in _data:
+                kwargs = dict(item)
+                children = kwargs.pop('children', None) or ()
+                lazy = kwargs.pop('lazy', False)
+                iid = kwargs.pop('iid', None)
+
+                if unique and kwargs.get('text', '') in names:
+                    iid = self.insert(_parent, tk.END, iid=iid, **kwargs)
+                    if iid == CANCEL:
+                        return CANCEL
+                    elif iid == SKIP:
+                        continue
+                    text = self.item(iid, 'text')
+                    renamed.update((_parent, iid))
+                else:
+                    text = kwargs.get('text', '')
+                    if iid is None or self.exists(iid):
+                        iid = self.iid_new()
+                    values = list(kwargs.get('values', ()))
+                    if len(values) > self.field.iid:
+                        values[self.field.iid] = iid
+                    if children and len(values) > self.field.size:
+                        word = 'item' if len(children) == 1 else 'items'
+                        values[self.field.size] = f'{len(children)} {word}'
+                    kwargs['values'] = values
+                    if not self.virtual:
+                        self.base.insert(_parent, tk.END, iid=iid, **kwargs)
+                    self.node_insert(_parent, tk.END, iid, **kwargs)
+                    self.names[iid] = set()
+                    self.pending.pop(iid, None)
+                    self.tag_index.set(iid, kwargs.get('tags', ()))
+                    if self.search_index is not None:
+                        self.search_index.add(iid, self.search_texts(iid, kwargs))
+
+                names.add(text)
+                count += 1
+
+                if lazy and self.loader:
+                    self.lazy_add(iid)
+                elif children and self.lazy and not int(kwargs.get('open', 0)):
+                    self.lazy_add(iid, children)
+                elif children:
+                    child_count = insert(iid, children, self.names_get(iid))
+                    if child_count == CANCEL:
+                        return CANCEL
+                    elif child_count != len(children) or iid in renamed:
+                        word = 'item' if child_count == 1 else 'items'
+                        self.value_set(self.field.size, f'{child_count} {word}', iid)
+
+            return count
+
+        if not bulk:
+            for item in data:
+                iid = self.insert(parent, tk.END, **item)
+
+                if 'children' in item:
+                    self.populate(iid, item['children'], bulk)
+            return
 
-        for item in data:
-            iid = self.insert(parent, tk.END, **item)
-            self.value_set(self.field.iid, iid, iid)
+        renamed = set()
+        unique = self.columns[0].get('unique', False)
+        count = insert(parent, data, self.names_get(parent))
+        if parent and count not in (CANCEL, 0):
+            count = len(self.get_children(parent))
+            word = 'item' if count == 1 else 'items'
+            self.value_set(self.field.size, f'{count} {word}', parent)
+
+        self.rows_invalidate(parent)
+        self.virtual_schedule()
+        self.refresh()
+        self.fit.clear()
+
+    def load(self, events, parent='', progress=None, done=None, batch=LOAD_BATCH):
+        def flush():
+            if siblings and parents[-1] is not None:
+                self.populate(parents[-1], siblings)
+            siblings.clear()
+
+        def step():
+            count = 0
+            for op, item in islice(events, batch):
+                count += 1
+                if op == 'item':
+                    if item.get('iid') is None or self.exists(item['iid']):
+                        item['iid'] = self.iid_new()
+                    siblings.append(item)
+                elif op == 'push':
+                    flush()
+                    parents.append(item['iid'] if self.exists(item['iid']) else None)
+                elif op == 'pop':
+                    flush()
+                    parents.pop()
+            flush()
+
+            if progress:
+                progress()
+
+            if count < batch:
+                self.loading = None
+                if done:
+                    done()
+            else:
+                self.loading = self.after(1, step)
+
+        parents = [parent]
+        siblings = []
+        self.loading = self.after_idle(step)
+
+    def lazy_add(self, item, children=None):
+        self.pending[item] = children
+        nodes = [(item, child) for child in children or ()]
+        while nodes:
+            parent, child = nodes.pop()
+            iid = child.get('iid')
+            if iid is None or self.exists(iid) or iid in self.pending_parents:
+                iid = child['iid'] = self.iid_new()
+            self.pending_parents[iid] = parent
+            if self.search_index is not None:
+                self.search_index.add(iid, self.lazy_texts(child))
+            nodes.extend((iid, node) for node in child.get('children') or ())
+
+        if not self.virtual:
+            self.base.insert(item, tk.END, iid=f'{item}{PLACEHOLDER}')
+
+    def lazy_discard(self, item):
+        nodes = list(self.pending.pop(item, None) or ())
+        while nodes:
+            node = nodes.pop()
+            self.pending_parents.pop(node.get('iid'), None)
+            if self.search_index is not None:
+                self.search_index.discard(node.get('iid'))
+            nodes.extend(node.get('children') or ())
+
+    def lazy_load(self, item):
+        if item not in self.pending:
+            return
 
-            if 'children' in item:
-                self.populate(iid, item['children'])
+        children = self.pending[item]
+        self.lazy_discard(item)
+        if not self.virtual and self.base.exists(f'{item}{PLACEHOLDER}'):
+            self.base.delete(f'{item}{PLACEHOLDER}')
+
+        self.populate(item, self.loader(item) if children is None else children)
+        if self.sort_order:
+            parents = [item]
+            for parent in parents:
+                parents.extend(child for child in self.get_children(parent) if child not in self.pending)
+            paused, self.history.paused = self.history.paused, True
+            try:
+                self.sort(self.sort_order, parents)
+            finally:
+                self.history.paused = paused
+
+    def search_texts(self, item, kw=None):
+        kw = kw or {}
+        text = kw['text'] if 'text' in kw else self.item(item, 'text')
+        values = kw['values'] if 'values' in kw else self.item(item, 'values')
+        derived = (self.field.iid, self.field.open, self.field.tags, self.field.size)
+
+        return (text, *(value for idx, value in enumerate(values) if idx not in derived))
+
+    def lazy_texts(self, child):
+        return self.search_texts(child['iid'], {'text': child.get('text', ''), 'values': child.get('values', ())})
+
+    def search_build(self):
+        if self.nodes is not None:
+            items = [item for item in self.nodes if item]
+        else:
+            items = list(self.get_children())
+            items.extend(item for item in self.detached_roots if self.exists(item))
+            for item in items:
+                items.extend(self.get_children(item))
+
+        texts = [(item, self.search_texts(item)) for item in items]
+        nodes = [child for children in self.pending.values() for child in children or ()]
+        while nodes:
+            node = nodes.pop()
+            texts.append((node['iid'], self.lazy_texts(node)))
+            nodes.extend(node.get('children') or ())
+
+        self.search_index = SearchIndex()
+        self.search_index.build(texts)
+
+    def index_discard(self, items):
+        nodes = list(items)
+        while nodes:
+            node = nodes.pop()
+            self.lazy_discard(node)
+            self.tag_index.discard(node)
+            if self.search_index is not None:
+                self.search_index.discard(node)
+            nodes.extend(self.get_children(node))
+
+    def search(self, query):
+        return self.search_visible(query)[0]
+
+    def search_visible(self, query):
+        if self.search_index is None:
+            self.search_build()
+
+        items = self.search_index.search(query)
+        self.journal_resolve(*(item for item in items if item in self.pending_parents))
+
+        roots = set(self.get_children())
+        found = set()
+        hidden = set()
+        visible = {''}
+        for item in items:
+            chain = []
+            node = item
+            while node not in visible and node not in hidden:
+                chain.append(node)
+                parent = self.parent(node)
+                if not parent and node not in roots:
+                    node = None
+                    break
+                node = parent
+
+            if node is None or node in hidden:
+                hidden.update(chain)
+            else:
+                visible.update(chain)
+                found.add(item)
 
-    def serialize(self):
-        def get_data(_item, _data):
-            for node in self.get_children(_item):
-                _item_data = self.item(node)
-                _data.append(_item_data)
-                if self.get_children(node):
-                    _item_data['children'] = []
-                    get_data(node, _item_data['children'])
+        return found, visible
 
-        data = {'headings': self.headings, 'columns': self.columns, 'data': {}}
+    def filter(self, query):
+        if not query.strip():
+            self.filter_clear()
+            return
+        if self.nodes is None:
+            return
 
-        tree_data = []
-        for item in self.get_children():
-            item_data = self.item(item)
-            if self.get_children(item):
-                item_data['children'] = []
-                tree_data.append(item_data)
-                get_data(item, item_data['children'])
+        self.filter_query = query
+        self.filter_apply()
+        self.refresh()
+
+    def filter_apply(self):
+        dirty, self.filter_dirty = self.filter_dirty, False
+        if self.filter_query is None:
+            return
+
+        _, visible = self.search_visible(self.filter_query)
+        self.filter_visible = visible
+        if not self.virtual:
+            for parent in visible:
+                children = self.nodes[parent].children
+                shown = tuple(child for child in children if child in visible)
+                current = self.filter_shown.get(parent)
+                if current is None and len(shown) == len(children) or current == shown and not dirty:
+                    continue
+
+                self.base.set_children(parent, *shown)
+                self.filter_shown[parent] = shown
+
+        self.rows_invalidate()
+        self.virtual_schedule()
+        self.fit.clear()
+
+    def filter_clear(self):
+        if self.filter_query is None:
+            return
+
+        self.filter_query = self.filter_visible = None
+        for parent in self.filter_shown:
+            if parent in self.nodes:
+                self.base.set_children(parent, *self.nodes[parent].children)
+        self.filter_shown = {}
+
+        self.rows_invalidate()
+        self.virtual_schedule()
+        self.refresh()
+        self.fit.clear()
+
+    def filter_show(self, _=None):
+        if self.nodes is None:
+            return 'break'
+
+        if not self.filter_bar:
+            bar = self.filter_bar = Entry(self.frame)
+            bar.grid(row=LAST_ROW + 2, column=0, columnspan=LAST_COLUMN + 1, sticky=tk.EW)
+            bar.var.trace_add('write', self.filter_changed)
+            for command, callback in (
+                    ('<Escape>', self.filter_hide),
+                    ('<Return>', self.filter_focus),
+                    ('<KP_Enter>', self.filter_focus)):
+                bar.bind(command, callback)
+
+        self.filter_bar.focus_set()
+        self.filter_bar.select_all()
+
+        return 'break'
+
+    def filter_changed(self, *_):
+        if self.filter_pending:
+            self.after_cancel(self.filter_pending)
+        self.filter_pending = self.after(FILTER_DELAY, self.filter_update)
+
+    def filter_update(self):
+        self.filter_pending = None
+        self.filter(self.filter_bar.get())
+
+    def filter_hide(self, _=None):
+        if self.filter_pending:
+            self.after_cancel(self.filter_pending)
+            self.filter_pending = None
+
+        self.filter_bar.destroy()
+        self.filter_bar = None
+        self.filter_clear()
+        self.focus_set()
+
+    def filter_focus(self, _=None):
+        if self.filter_pending:
+            self.after_cancel(self.filter_pending)
+            self.filter_update()
+
+        if self.filter_query is not None:
+            matches = self.search(self.filter_query)
+            self.rows_build()
+            for item in self.rows:
+                if item in matches:
+                    self.see(item)
+                    self.focus(item)
+                    self.selection_set(item)
+                    break
+
+        self.focus_set()
+
+    def iid_new(self):
+        self.serial += 1
+        iid = f'I{self.serial:03X}'
+        while self.exists(iid) or iid in self.pending_parents:
+            self.serial += 1
+            iid = f'I{self.serial:03X}'
+
+        return iid
+
+    def serialize_item(self, item):
+        data = self.item(item)
+        data['iid'] = item
+        if item in self.pending:
+            if self.pending[item] is None:
+                data['lazy'] = True
             else:
-                tree_data.append(item_data)
+                data['children'] = list(self.pending[item])
+
+        return data
+
+    def serialize_subtree(self, item):
+        data = self.serialize_item(item)
+        if item not in self.pending and self.get_children(item):
+            data['children'] = [self.serialize_subtree(node) for node in self.get_children(item)]
+
+        return data
 
-        data['data'] = tree_data
+    def serialize(self):
+        data = {'headings': self.headings, 'columns': self.columns, 'data': {}}
+        data['data'] = [self.serialize_subtree(node) for node in self.get_children('')]
 
         return data
 
+    def serialize_items(self, item=''):
+        for node in self.get_children(item):
+            data = self.serialize_item(node)
+            if node not in self.pending and self.get_children(node):
+                data['children'] = self.serialize_items(node)
+            yield data
+
+    def serialize_iter(self, settings=()):
+        def get_data(_item):
+            for idx, node in enumerate(self.get_children(_item)):
+                if idx:
+                    yield ', '
+
+                _item_data = json.dumps(self.serialize_item(node))
+                if node in self.pending or not self.get_children(node):
+                    yield _item_data
+                    continue
+
+                yield _item_data[:-1] + ', "children": ['
+                yield from get_data(node)
+                yield ']}'
+
+        yield json.dumps({'headings': self.headings, 'columns': self.columns})[:-1]
+        yield ', "data": ['
+        yield from get_data('')
+        yield '], "settings": ' + json.dumps(settings) + '}'
+
+    def item_record(self, item, kw):
+        if self.journal is None and self.history.paused:
+            return
+
+        options = {key: kw[key] for key in ('text', 'open') if key in kw}
+        previous = {key: self.item(item, key) for key in ('text',) if key in kw}
+        if 'values' in kw:
+            values = self.item(item, 'values')
+            derived = [self.field.iid, self.field.open, self.field.tags]
+            if len(values) > self.field.item and values[self.field.item] == 'Node':
+                derived.append(self.field.size)
+            for idx, (old, new) in enumerate(zip_longest(values, kw['values'], fillvalue='')):
+                if idx not in derived and str(old) != str(new):
+                    options['values'] = list(kw['values'])
+                    previous['values'] = list(values)
+                    break
+
+        if options and self.journal is not None:
+            self.journal.record('item', iid=item, options=options)
+        options.pop('open', None)
+        if options and previous != options:
+            self.history.record({'op': 'item', 'iid': item, 'options': options},
+                                [{'op': 'item', 'iid': item, 'options': previous}])
+
+    def journal_resolve(self, *items):
+        for item in items:
+            chain = []
+            while item and not self.exists(item) and item in self.pending_parents:
+                chain.append(item)
+                item = self.pending_parents[item]
+            if chain:
+                for parent in (item, *reversed(chain[1:])):
+                    self.lazy_load(parent)
+
+        return all(not item or self.exists(item) for item in items)
+
+    def journal_replay(self, entries):
+        for entry in entries:
+            op = entry['op']
+            if op == 'insert':
+                if self.exists(entry['iid']) or not self.journal_resolve(entry['parent']):
+                    continue
+
+                self.populate(entry['parent'], [dict(entry['item'], iid=entry['iid'])])
+                if self.journal is not None and self.exists(entry['iid']):
+                    self.journal.record('insert', parent=entry['parent'], index=tk.END, iid=entry['iid'],
+                                        item=self.serialize_subtree(entry['iid']))
+                if entry['index'] != tk.END and self.exists(entry['iid']):
+                    self.move(entry['iid'], entry['parent'], entry['index'])
+            elif op == 'delete':
+                items = [item for item in entry['items'] if self.journal_resolve(item)]
+                if items:
+                    self.delete(*items)
+            elif op == 'detach':
+                items = [item for item in entry['items'] if self.journal_resolve(item)]
+                if items:
+                    self.focus(items[0])
+                    self.selection_set(items)
+                    self.detach()
+            elif op == 'move':
+                if self.journal_resolve(entry['iid'], entry['parent']):
+                    self.move(entry['iid'], entry['parent'], entry['index'])
+            elif op == 'item':
+                if self.journal_resolve(entry['iid']):
+                    self.names_discard(entry['iid'])
+                    self.item(entry['iid'], **entry['options'])
+                    self.names_add(entry['iid'])
+            elif op == 'order':
+                if self.journal_resolve(entry['parent']):
+                    current = self.get_children(entry['parent'])
+                    known = set(current)
+                    children = [item for item in entry['children'] if item in known]
+                    known.difference_update(children)
+                    children.extend(item for item in current if item in known)
+                    self.reorder(entry['parent'], children)
+
+        self.rows_invalidate()
+        self.virtual_schedule()
+        self.refresh()
+
     def popup_menu(self, event):
 
-        region = self.identify_region(event.x, event.y)
+        region = self.base.identify_region(event.x, event.y)
         if region == 'heading':
             return
 
@@ -1434,7 +4077,7 @@ class Treeview(ttk.Treeview):
             self.active_popup_widget = None
 
         self.popup.x, self.popup.y = event.x_root, event.y_root
-        item = self.identify('item', event.x, event.y)
+        item = self.base.identify('item', event.x, event.y)
         self.focus(item)
         self.focus_set()
         self.popup.tk_popup(event.x_root, event.y_root, 0)
@@ -1443,7 +4086,7 @@ class Treeview(ttk.Treeview):
         if not row or not column:
             return
 
-        bbox = self.bbox(row, column)
+        bbox = self.base.bbox(row, column)
         if not bbox:
             return
 
@@ -1451,8 +4094,8 @@ class Treeview(ttk.Treeview):
             self.active_popup_widget.destroy()
             self.active_popup_widget = None
 
-        x_pos, y_pos, width, height = self.bbox(row, column)
-        item = self.identify('item', x_pos, y_pos+self.rowheight)
+        x_pos, y_pos, width, height = self.base.bbox(row, column)
+        item = self.base.identify('item', x_pos, y_pos+self.rowheight)
         y_pos += height // 2
 
         if column == '#0':
@@ -1520,34 +4163,11 @@ class Treeview(ttk.Treeview):
 
                     if not idx:
                         if unique:
-                            parent = self.parent(_item)
-                            children = self.get_children(parent)
-
-                            column_values = []
-                            for node in children:
-                                column_values.append(self.item(node, 'text'))
-
-                            for node in children:
-                                while wdg_text == self.item(node, 'text'):
-                                    result = self.dlg_rename(
-                                        'Rename',
-                                        f'The name "{wdg_text}" already exists, please choose another '
-                                        f'name and try again.',
-                                        wdg_text,
-                                    )
-                                    if result == '':
-                                        continue
-
-                                    if result in (SKIP, CANCEL):
-                                        return result
-
-                                    wdg_text = result
-                                    self.item(item, text=text)
-
-                                if wdg_text == self.item(node, 'text'):
-                                    return
-
-                        self.item(_item, text=wdg_text)
+                            wdg_text = self.name_resolve(self.parent(_item), wdg_text)
+                            if wdg_text in (SKIP, CANCEL):
+                                return wdg_text
+
+                        self.rename(_item, wdg_text)
                     else:
                         self.value_set(idx-1, wdg.get(), _item)
                 elif not wdg_text:
@@ -1561,7 +4181,7 @@ class Treeview(ttk.Treeview):
 
                 wdg.destroy()
                 self.active_popup_widget = None
-                self.tags_reset()
+                self.refresh()
                 self.focus_set()
 
             def destroy(_=None):
@@ -1570,11 +4190,10 @@ class Treeview(ttk.Treeview):
 
                 _item = self.focus()
                 _text = self.item(_item, 'text')
-                self.tags_reset()
                 if not _text:
                     self.delete(item)
 
-                self.tags_reset()
+                self.refresh()
                 self.focus_set()
 
             def control_a(_=None):
@@ -1640,7 +4259,7 @@ class Treeview(ttk.Treeview):
                         ('<Escape>', destroy),
                         ('<Control-z>', destroy),
                         ('<Control-a>', control_a)):
-                    wdg.bind(command, callback)
+                    wdg.bind(command, self.handler(f'editor {command} {callback.__name__}', callback))
 
         elif _type == 'Combobox':
             def tab(event):
@@ -1671,7 +4290,7 @@ class Treeview(ttk.Treeview):
             def update(_):
                 _text = wdg.get().strip(' ')
                 if not idx:
-                    self.item(self.focus(), text=_text)
+                    self.rename(self.focus(), _text)
                 else:
                     self.value_set(idx-1, _text, self.focus())
                 destroy()
@@ -1708,7 +4327,7 @@ class Treeview(ttk.Treeview):
                     ('<Escape>', destroy),
                     ('<Control-z>', destroy),
                     ('<Control-a>', control_a)):
-                wdg.bind(command, callback)
+                wdg.bind(command, self.handler(f'editor {command} {callback.__name__}', callback))
 
         return wdg
 
@@ -1728,6 +4347,8 @@ class Treeview(ttk.Treeview):
             self.active_popup_widget = None
 
     def bindings_set(self):
+        edits = {self.popup_widget_edit, self.cut, self.paste, self.undo, self.redo, self.insert_node,
+                 self.insert_leaf, self.popup_menu, self.button_double_click}
         for command, callback in (
                 ('<Up>', self.popup_widget_destroy),
                 ('<Down>', self.popup_widget_destroy),
@@ -1746,9 +4367,12 @@ class Treeview(ttk.Treeview):
                 ('<Control-c>', self.copy),
                 ('<Control-v>', self.paste),
                 ('<Control-z>', self.undo),
+                ('<Control-y>', self.redo),
+                ('<Control-Z>', self.redo),
                 ('<Control-d>', self.cut),
                 ('<Control-f>', self.insert_node),
                 ('<Control-i>', self.insert_leaf),
+                ('<Control-slash>', self.filter_show),
                 ('<Control-m>', self.popup_menu),
                 ('<KeyRelease>', self.key_release),
                 ('<ButtonPress-3>', self.popup_menu),
@@ -1756,10 +4380,51 @@ class Treeview(ttk.Treeview):
                 ('<ButtonRelease-1>', self.button_release),
                 ('<<TreeviewOpen>>', self.expand_tree),
                 ('<<TreeviewClose>>', self.collapse_tree)):
-            self.bind(command, callback)
+            self.bind(command, self.handler(f'{command} {callback.__name__}', callback, callback in edits))
+
+    def handler(self, action, callback, edit=False):
+        def run(*args):
+            if edit and not self.editable(callback):
+                return 'break'
+            if self.tcl.trace is None:
+                return callback(*args)
+
+            previous, self.tcl.action = self.tcl.action, action
+            self.tcl.run(action)
+            try:
+                return callback(*args)
+            finally:
+                self.tcl.action = previous
+
+        return self.watchdog.wrap(action, run) if self.watchdog else run
+
+    def editable(self, callback=None):
+        if self.loading:
+            return False
+
+        return not self.pasting or callback in (self.paste, self.undo, self.redo)
+
+    def trace_start(self):
+        self.tcl.trace = {}
+        self.tcl.runs = {}
+
+    def trace_stop(self):
+        self.tcl.trace = None
+
+    def trace_report(self, top=5):
+        return self.tcl.report(top) if self.tcl.trace is not None else ''
+
+    def trace_log(self, top=5):
+        if self.tcl.trace is not None:
+            log.info('Tcl calls per action\n%s', self.trace_report(top))
+
+    def latency_log(self):
+        if self.watchdog:
+            log.info('Handler latency\n%s', self.watchdog.report())
 
 
 def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s %(message)s')
     app = App()
     app.mainloop()
 
@@ -0,0 +1,116 @@
+import json
+import tempfile
+import unittest
+
+from pathlib import Path
+
+from main import Journal, JsonStream, Snapshot, SNAPSHOT_SUFFIX
+
+
+def nest(events):
+    data = []
+    stack = [data]
+    for op, item in events:
+        if op == 'item':
+            stack[-1].append(item)
+        elif op == 'push':
+            item['children'] = []
+            stack.append(item['children'])
+        elif op == 'pop':
+            stack.pop()
+
+    return data
+
+
+def tree():
+    def leaf(idx):
+        return {'text': f'photo{idx}.png', 'image': '', 'iid': f'L{idx}',
+                'values': ['', 'Leaf', '', '', f'{idx} Kb', '2020/06/15 17:35:14', 'café "quoted"'],
+                'open': 0, 'tags': ['odd']}
+
+    def folder(name, level, count):
+        children = [folder(f'{name}_{idx}', level + 1, count) if level < 3 and not idx % 2 else leaf(level * 10 + idx)
+                    for idx in range(count)]
+        return {'text': name, 'image': '', 'iid': name, 'values': ['', 'Node', True, '', f'{count} items', '', ''],
+                'open': level % 2, 'tags': 'even', 'children': children}
+
+    return [folder('F0', 1, 4), {'text': 'Empty', 'iid': 'E', 'values': [], 'open': 1, 'children': []},
+            {'text': 'Remote', 'iid': 'R', 'lazy': True}, leaf(99)]
+
+
+class StorageTest(unittest.TestCase):
+    header = {'headings': [{'text': 'Name', 'anchor': 'w'}], 'columns': [{'width': 180, 'minwidth': 3}],
+              'settings': [['focus', 'L99']]}
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.data = json.loads(json.dumps(tree()))
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def write(self, store, name):
+        path = Path(self.folder.name, name)
+        store.write(path, self.header, self.data)
+        return path
+
+    def read(self, stream, expand=None):
+        try:
+            header = stream.header()
+            data = nest(stream.items(expand))
+            self.assertEqual(stream.progress, 1.0)
+        finally:
+            stream.close()
+
+        return header, data
+
+    def test_json_round_trip(self):
+        path = self.write(JsonStream, 'treeview.json')
+        for chunk in (1, 65536):
+            stream = JsonStream(path, chunk)
+            header, data = self.read(stream)
+            self.assertEqual(data, self.data)
+            self.assertEqual(header, {key: value for key, value in self.header.items() if key != 'settings'})
+            self.assertEqual(stream.tail, {'settings': self.header['settings']})
+
+    def test_snapshot_round_trip(self):
+        path = self.write(Snapshot, f'treeview{SNAPSHOT_SUFFIX}')
+        header, data = self.read(Snapshot(path))
+        self.assertEqual(data, self.data)
+        self.assertEqual(header, self.header)
+
+    def test_lazy_expand(self):
+        def expand(item):
+            asked.append(item['iid'])
+            return int(item.get('open', 0))
+
+        for name, store, reader in (('treeview.json', JsonStream, lambda path: JsonStream(path, 1)),
+                                    (f'treeview{SNAPSHOT_SUFFIX}', Snapshot, Snapshot)):
+            asked = []
+            _, data = self.read(reader(self.write(store, name)), expand)
+            self.assertEqual(data, self.data)
+            self.assertEqual(asked, ['F0', 'F0_0', 'F0_2', 'E'])
+
+    def test_empty(self):
+        self.data = []
+        for name, store in (('treeview.json', JsonStream), (f'treeview{SNAPSHOT_SUFFIX}', Snapshot)):
+            _, data = self.read(store(self.write(store, name)))
+            self.assertEqual(data, [])
+
+    def test_journal_truncated(self):
+        journal = Journal(Path(self.folder.name, 'treeview.journal'))
+        journal.record('item', iid='L1', text='photo1.png')
+        journal.record('delete', items=['L2'])
+        journal.flush()
+        with open(str(journal.path), 'a') as f:
+            f.write('{"op": "move", "iid"')
+
+        with self.assertLogs('main', 'WARNING'):
+            self.assertEqual([entry['op'] for entry in Journal(journal.path).read()], ['item', 'delete'])
+        journal.record('detach', items=['L3'])
+        journal.flush()
+        self.assertEqual([entry['op'] for entry in Journal(journal.path).read()], ['item', 'delete', 'detach'])
+
+
+if __name__ == '__main__':
+    unittest.main()